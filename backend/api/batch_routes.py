@@ -3,29 +3,183 @@ Batch Processing API Routes
 Handles batch processing endpoints for multiple videos, audio, and translations
 """
 
-from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends, Query
-from typing import List, Dict, Optional, Any
-from pydantic import BaseModel, Field
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends, Query, Request, Response
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from typing import List, Dict, Optional, Any, Iterable, Iterator, Sequence
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError, field_validator, model_validator
+from types import MappingProxyType
 from datetime import datetime
+from contextlib import asynccontextmanager
+from functools import lru_cache
+import asyncio
 import logging
+import os
+import time
 
-from services.batch_service import BatchProcessingService, JobPriority, JobStatus
+import orjson
+
+from services.batch_service import BatchProcessingService, JobPriority, JobStatus, JobSpec
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-# Initialize router
-router = APIRouter(prefix="/api/batch", tags=["batch"])
+@asynccontextmanager
+async def _lifespan(app):
+    """Run the submission batcher on the application's event loop"""
+    batcher = AdaptiveBatcher(get_batch_service())
+    batcher.start()
+    app.state.batch_batcher = batcher
+    try:
+        yield
+    finally:
+        await batcher.stop()
 
-# Initialize batch service (singleton)
-batch_service = None
+# Initialize router (include_router merges its lifespan into the app's)
+router = APIRouter(prefix="/api/batch", tags=["batch"], default_response_class=ORJSONResponse,
+                   lifespan=_lifespan)
+
+def _stream_json_array(items: Iterable[Any], prefix: bytes, suffix: bytes) -> Iterator[bytes]:
+    """Yield a JSON array one element at a time, wrapped in prefix and suffix"""
+    yield prefix
+    first = True
+    for item in items:
+        if not first:
+            yield b','
+        yield orjson.dumps(item)
+        first = False
+    yield suffix
+
+# Last (monotonic time, ISO timestamp) pair served by _iso_now
+_last_timestamp = [0.0, ""]
+
+def _iso_now(ttl: float = 0.25) -> str:
+    """Current time as an ISO string, reused for up to ttl seconds"""
+    now = time.monotonic()
+    if now - _last_timestamp[0] > ttl:
+        _last_timestamp[0] = now
+        _last_timestamp[1] = datetime.now().isoformat()
+    return _last_timestamp[1]
 
+# Initialize batch service (singleton)
+@lru_cache(maxsize=1)
 def get_batch_service():
     """Get batch service instance"""
-    global batch_service
-    if batch_service is None:
-        batch_service = BatchProcessingService()
-    return batch_service
+    return BatchProcessingService()
+
+class AdaptiveBatcher:
+    """
+    Coalesces concurrent batch submissions into a single service call
+    
+    Each caller still gets its own batch. Under low load a submission is
+    flushed immediately; when more submissions are already waiting, the
+    window is held open for up to flush_interval seconds (or max_batch jobs)
+    so they share one queue registration and one save to disk.
+    """
+    
+    def __init__(self, service: BatchProcessingService,
+                 flush_interval: float = 0.005, max_batch: int = 256):
+        self.service = service
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        # Submissions taken off the queue by the current flush
+        self._pending: List[Any] = []
+    
+    def start(self):
+        """Create the queue and flush task on the running event loop"""
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """Stop the flush task and fail any submissions still queued"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        
+        # Submissions the task had collected but not flushed, then the rest
+        leftover = self._pending
+        self._pending = []
+        while not self._queue.empty():
+            leftover.append(self._queue.get_nowait())
+        for _, future in leftover:
+            if not future.done():
+                future.set_exception(RuntimeError("Batch batcher stopped"))
+    
+    async def submit(self, job_type: str, requests: Sequence[JobSpec],
+                     batch_name: Optional[str], priority: JobPriority) -> str:
+        """Queue a batch for creation and wait for its batch ID"""
+        if self._task is None:
+            raise RuntimeError("Batch batcher is not running")
+        
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait(((job_type, requests, batch_name, priority), future))
+        return await future
+    
+    async def _collect(self) -> List[Any]:
+        """Wait for one submission, then gather whatever fits in the window"""
+        pending = self._pending = [await self._queue.get()]
+        total_jobs = len(pending[0][0][1])
+        
+        if self._queue.empty():
+            return pending
+        
+        # More submissions are waiting: hold the window open, then take what
+        # fits without awaiting the queue (a cancelled get() could drop an item)
+        await asyncio.sleep(self.flush_interval)
+        while total_jobs < self.max_batch and not self._queue.empty():
+            item = self._queue.get_nowait()
+            pending.append(item)
+            total_jobs += len(item[0][1])
+        
+        return pending
+    
+    async def _run(self):
+        """Background task that flushes collected submissions"""
+        while True:
+            pending = await self._collect()
+            try:
+                batch_ids = await self.service.create_batches([spec for spec, _ in pending])
+            except Exception as e:
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(e)
+                self._pending = []
+                continue
+            
+            for (_, future), batch_id in zip(pending, batch_ids):
+                if not future.done():
+                    future.set_result(batch_id)
+            self._pending = []
+
+class RequestGate:
+    """Bounds the number of batch-create requests handled at once"""
+    
+    def __init__(self, max_inflight: int):
+        self.max_inflight = max_inflight
+        self.inflight = 0
+        self._semaphore = asyncio.Semaphore(max_inflight)
+    
+    async def __call__(self):
+        """FastAPI dependency: wait for a slot and hold it for the request"""
+        async with self._semaphore:
+            self.inflight += 1
+            try:
+                yield
+            finally:
+                self.inflight -= 1
+
+create_gate = RequestGate(int(os.getenv("BATCH_API_MAX_INFLIGHT", "64")))
+
+def get_batch_batcher(request: Request) -> AdaptiveBatcher:
+    """Get the batch submission batcher created by the router lifespan"""
+    return request.app.state.batch_batcher
 
 # Pydantic models for request/response
 
@@ -53,23 +207,56 @@ class TranslationJobRequest(BaseModel):
     target_lang: str = Field(..., description="Target language code")
     quality: str = Field("medium", description="Translation quality (fast/medium/high)")
 
-class BatchVideoRequest(BaseModel):
-    """Batch video processing request"""
-    jobs: List[VideoJobRequest] = Field(..., min_items=1, max_items=50, description="Video jobs")
+_PRIORITY_MAP = MappingProxyType({
+    "low": JobPriority.LOW,
+    "medium": JobPriority.MEDIUM,
+    "high": JobPriority.HIGH,
+    "urgent": JobPriority.URGENT
+})
+
+class BatchRequestBase(BaseModel):
+    """Fields shared by all batch processing requests"""
     batch_name: Optional[str] = Field(None, description="Optional batch name")
-    priority: str = Field("medium", description="Batch priority (low/medium/high/urgent)")
+    priority: JobPriority = Field(JobPriority.MEDIUM, description="Batch priority (low/medium/high/urgent)")
+
+    @field_validator("priority", mode="before")
+    @classmethod
+    def parse_priority(cls, value: Any) -> Any:
+        """Accept priority names case-insensitively (unknown names fall back to medium)"""
+        if isinstance(value, str):
+            return _PRIORITY_MAP.get(value.lower(), JobPriority.MEDIUM)
+        return value
 
-class BatchAudioRequest(BaseModel):
+class BatchVideoRequest(BatchRequestBase):
+    """Batch video processing request"""
+    jobs: List[VideoJobRequest] = Field(..., min_length=1, max_length=50, description="Video jobs")
+
+class BatchAudioRequest(BatchRequestBase):
     """Batch audio processing request"""
-    jobs: List[AudioJobRequest] = Field(..., min_items=1, max_items=100, description="Audio jobs")
-    batch_name: Optional[str] = Field(None, description="Optional batch name")
-    priority: str = Field("medium", description="Batch priority (low/medium/high/urgent)")
+    jobs: List[AudioJobRequest] = Field(..., min_length=1, max_length=100, description="Audio jobs")
 
-class BatchTranslationRequest(BaseModel):
+class BatchTranslationRequest(BatchRequestBase):
     """Batch translation processing request"""
-    jobs: List[TranslationJobRequest] = Field(..., min_items=1, max_items=200, description="Translation jobs")
-    batch_name: Optional[str] = Field(None, description="Optional batch name")
-    priority: str = Field("medium", description="Batch priority (low/medium/high/urgent)")
+    jobs: List[TranslationJobRequest] = Field(..., min_length=1, max_length=200, description="Translation jobs")
+
+class MixedBatchRequest(BatchRequestBase):
+    """Mixed batch request (one batch per non-empty job type)"""
+    video: List[VideoJobRequest] = Field(default_factory=list, max_length=50, description="Video jobs")
+    audio: List[AudioJobRequest] = Field(default_factory=list, max_length=100, description="Audio jobs")
+    translation: List[TranslationJobRequest] = Field(default_factory=list, max_length=200, description="Translation jobs")
+
+    @model_validator(mode="after")
+    def check_not_empty(self) -> "MixedBatchRequest":
+        """Require at least one job of any type"""
+        if not (self.video or self.audio or self.translation):
+            raise ValueError("At least one video, audio or translation job is required")
+        return self
+
+# Request body validators, compiled once and fed raw JSON bytes
+_VIDEO_BATCH_ADAPTER = TypeAdapter(BatchVideoRequest)
+_AUDIO_BATCH_ADAPTER = TypeAdapter(BatchAudioRequest)
+_TRANSLATION_BATCH_ADAPTER = TypeAdapter(BatchTranslationRequest)
+_MIXED_BATCH_ADAPTER = TypeAdapter(MixedBatchRequest)
 
 class BatchResponse(BaseModel):
     """Batch creation response"""
@@ -117,25 +304,52 @@ class ServiceStatsResponse(BaseModel):
     is_running: bool
     total_batches: int
     active_batches: int
+    worker_queue_depths: List[int]
+    steal_success_rate: float
+    steals_per_second: float
+    inflight_create_requests: int
 
 # Helper functions
 
-def parse_priority(priority_str: str) -> JobPriority:
-    """Parse priority string to JobPriority enum"""
-    priority_map = {
-        "low": JobPriority.LOW,
-        "medium": JobPriority.MEDIUM,
-        "high": JobPriority.HIGH,
-        "urgent": JobPriority.URGENT
+def _request_body_openapi(model: type) -> Dict[str, Any]:
+    """OpenAPI requestBody for a model, with its nested definitions inlined"""
+    schema = model.model_json_schema()
+    definitions = schema.pop("$defs", {})
+    
+    def resolve(node: Any) -> Any:
+        if isinstance(node, dict):
+            if "$ref" in node:
+                return resolve(definitions[node["$ref"].rsplit("/", 1)[-1]])
+            return {key: resolve(value) for key, value in node.items()}
+        if isinstance(node, list):
+            return [resolve(value) for value in node]
+        return node
+    
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": resolve(schema)}}
+        }
     }
-    return priority_map.get(priority_str.lower(), JobPriority.MEDIUM)
+
+async def _parse_body(http_request: Request, adapter: TypeAdapter) -> Any:
+    """Validate a raw JSON request body in pydantic-core (422 on failure)"""
+    try:
+        return adapter.validate_json(await http_request.body())
+    except ValidationError as e:
+        raise RequestValidationError([
+            {**error, "loc": ("body", *error["loc"])}
+            for error in e.errors(include_url=False)
+        ])
 
 # API Endpoints
 
-@router.post("/video", response_model=BatchResponse)
+@router.post("/video", response_model=BatchResponse, openapi_extra=_request_body_openapi(BatchVideoRequest))
 async def create_video_batch(
-    request: BatchVideoRequest,
-    service: BatchProcessingService = Depends(get_batch_service)
+    http_request: Request,
+    service: BatchProcessingService = Depends(get_batch_service),
+    batcher: AdaptiveBatcher = Depends(get_batch_batcher),
+    _: None = Depends(create_gate)
 ):
     """
     Create a batch of video generation jobs
@@ -143,16 +357,15 @@ async def create_video_batch(
     This endpoint allows you to submit multiple video generation requests
     that will be processed in parallel according to the specified priority.
     """
+    request: BatchVideoRequest = await _parse_body(http_request, _VIDEO_BATCH_ADAPTER)
+    
     try:
-        # Convert jobs to dict format
-        video_requests = [job.dict() for job in request.jobs]
-        priority = parse_priority(request.priority)
-        
-        # Create batch
-        batch_id = await service.create_video_batch(
-            video_requests=video_requests,
+        # Create batch (the service reads the validated models' attributes directly)
+        batch_id = await batcher.submit(
+            "video",
+            request.jobs,
             batch_name=request.batch_name,
-            priority=priority
+            priority=request.priority
         )
         
         # Get batch info for response
@@ -166,13 +379,15 @@ async def create_video_batch(
         )
         
     except Exception as e:
-        logger.error(f"Failed to create video batch: {e}")
+        logger.error("Failed to create video batch: %s", e)
         raise HTTPException(status_code=500, detail=f"Failed to create video batch: {str(e)}")
 
-@router.post("/audio", response_model=BatchResponse)
+@router.post("/audio", response_model=BatchResponse, openapi_extra=_request_body_openapi(BatchAudioRequest))
 async def create_audio_batch(
-    request: BatchAudioRequest,
-    service: BatchProcessingService = Depends(get_batch_service)
+    http_request: Request,
+    service: BatchProcessingService = Depends(get_batch_service),
+    batcher: AdaptiveBatcher = Depends(get_batch_batcher),
+    _: None = Depends(create_gate)
 ):
     """
     Create a batch of audio generation jobs
@@ -180,16 +395,15 @@ async def create_audio_batch(
     This endpoint allows you to submit multiple text-to-speech requests
     that will be processed in parallel according to the specified priority.
     """
+    request: BatchAudioRequest = await _parse_body(http_request, _AUDIO_BATCH_ADAPTER)
+    
     try:
-        # Convert jobs to dict format
-        audio_requests = [job.dict() for job in request.jobs]
-        priority = parse_priority(request.priority)
-        
-        # Create batch
-        batch_id = await service.create_audio_batch(
-            audio_requests=audio_requests,
+        # Create batch (the service reads the validated models' attributes directly)
+        batch_id = await batcher.submit(
+            "audio",
+            request.jobs,
             batch_name=request.batch_name,
-            priority=priority
+            priority=request.priority
         )
         
         # Get batch info for response
@@ -203,13 +417,15 @@ async def create_audio_batch(
         )
         
     except Exception as e:
-        logger.error(f"Failed to create audio batch: {e}")
+        logger.error("Failed to create audio batch: %s", e)
         raise HTTPException(status_code=500, detail=f"Failed to create audio batch: {str(e)}")
 
-@router.post("/translation", response_model=BatchResponse)
+@router.post("/translation", response_model=BatchResponse, openapi_extra=_request_body_openapi(BatchTranslationRequest))
 async def create_translation_batch(
-    request: BatchTranslationRequest,
-    service: BatchProcessingService = Depends(get_batch_service)
+    http_request: Request,
+    service: BatchProcessingService = Depends(get_batch_service),
+    batcher: AdaptiveBatcher = Depends(get_batch_batcher),
+    _: None = Depends(create_gate)
 ):
     """
     Create a batch of translation jobs
@@ -217,16 +433,15 @@ async def create_translation_batch(
     This endpoint allows you to submit multiple translation requests
     that will be processed in parallel according to the specified priority.
     """
+    request: BatchTranslationRequest = await _parse_body(http_request, _TRANSLATION_BATCH_ADAPTER)
+    
     try:
-        # Convert jobs to dict format
-        translation_requests = [job.dict() for job in request.jobs]
-        priority = parse_priority(request.priority)
-        
-        # Create batch
-        batch_id = await service.create_translation_batch(
-            translation_requests=translation_requests,
+        # Create batch (the service reads the validated models' attributes directly)
+        batch_id = await batcher.submit(
+            "translation",
+            request.jobs,
             batch_name=request.batch_name,
-            priority=priority
+            priority=request.priority
         )
         
         # Get batch info for response
@@ -240,10 +455,63 @@ async def create_translation_batch(
         )
         
     except Exception as e:
-        logger.error(f"Failed to create translation batch: {e}")
+        logger.error("Failed to create translation batch: %s", e)
         raise HTTPException(status_code=500, detail=f"Failed to create translation batch: {str(e)}")
 
-@router.get("/status/{batch_id}", response_model=BatchStatusResponse)
+@router.post("/mixed", response_model=List[BatchResponse], openapi_extra=_request_body_openapi(MixedBatchRequest))
+async def create_mixed_batch(
+    http_request: Request,
+    service: BatchProcessingService = Depends(get_batch_service),
+    batcher: AdaptiveBatcher = Depends(get_batch_batcher),
+    _: None = Depends(create_gate)
+):
+    """
+    Create video, audio and translation batches in a single call
+    
+    One batch is created per non-empty job type, all sharing the request's
+    batch name and priority. The submissions are made concurrently so they
+    are registered with the service together.
+    """
+    request: MixedBatchRequest = await _parse_body(http_request, _MIXED_BATCH_ADAPTER)
+    
+    try:
+        job_groups = [
+            (job_type, jobs)
+            for job_type, jobs in (
+                ("video", request.video),
+                ("audio", request.audio),
+                ("translation", request.translation)
+            )
+            if jobs
+        ]
+        
+        batch_ids = await asyncio.gather(*[
+            batcher.submit(
+                job_type,
+                job_requests,
+                batch_name=request.batch_name,
+                priority=request.priority
+            )
+            for job_type, job_requests in job_groups
+        ])
+        
+        responses = []
+        for (job_type, job_requests), batch_id in zip(job_groups, batch_ids):
+            batch_request = service.batch_requests.get(batch_id)
+            responses.append(BatchResponse(
+                batch_id=batch_id,
+                message=f"{job_type.capitalize()} batch created successfully with {len(job_requests)} jobs",
+                total_jobs=len(job_requests),
+                estimated_duration=batch_request.estimated_duration if batch_request else None
+            ))
+        
+        return responses
+        
+    except Exception as e:
+        logger.error("Failed to create mixed batch: %s", e)
+        raise HTTPException(status_code=500, detail=f"Failed to create mixed batch: {str(e)}")
+
+@router.get("/status/{batch_id}", response_model=None, responses={200: {"model": BatchStatusResponse}})
 async def get_batch_status(
     batch_id: str,
     service: BatchProcessingService = Depends(get_batch_service)
@@ -258,36 +526,16 @@ async def get_batch_status(
     - Error details if any
     """
     try:
-        batch_status = await service.get_batch_status(batch_id)
+        # Served from the service's per-batch cache, rebuilt only when the batch changes
+        batch_status_json = await service.get_batch_status_json(batch_id)
         
-        if not batch_status:
-            raise HTTPException(status_code=404, detail=f"Batch {batch_id} not found")
+        if batch_status_json is None:
+            return ORJSONResponse({"detail": f"Batch {batch_id} not found"}, status_code=404)
         
-        # Convert jobs to response format
-        jobs = [
-            JobStatusResponse(**job_data)
-            for job_data in batch_status['jobs']
-        ]
+        return Response(content=batch_status_json, media_type="application/json")
         
-        return BatchStatusResponse(
-            id=batch_status['id'],
-            name=batch_status['name'],
-            status=batch_status['status'],
-            total_jobs=batch_status['total_jobs'],
-            completed_jobs=batch_status['completed_jobs'],
-            failed_jobs=batch_status['failed_jobs'],
-            overall_progress=batch_status['overall_progress'],
-            job_statuses=batch_status['job_statuses'],
-            created_at=batch_status['created_at'],
-            estimated_duration=batch_status['estimated_duration'],
-            actual_duration=batch_status['actual_duration'],
-            jobs=jobs
-        )
-        
-    except HTTPException:
-        raise
     except Exception as e:
-        logger.error(f"Failed to get batch status: {e}")
+        logger.error("Failed to get batch status: %s", e)
         raise HTTPException(status_code=500, detail=f"Failed to get batch status: {str(e)}")
 
 @router.delete("/cancel/{batch_id}")
@@ -304,17 +552,18 @@ async def cancel_batch(
         success = await service.cancel_batch(batch_id)
         
         if not success:
-            raise HTTPException(status_code=404, detail=f"Batch {batch_id} not found or cannot be cancelled")
+            return ORJSONResponse(
+                {"detail": f"Batch {batch_id} not found or cannot be cancelled"},
+                status_code=404
+            )
         
         return {"message": f"Batch {batch_id} cancelled successfully"}
         
-    except HTTPException:
-        raise
     except Exception as e:
-        logger.error(f"Failed to cancel batch: {e}")
+        logger.error("Failed to cancel batch: %s", e)
         raise HTTPException(status_code=500, detail=f"Failed to cancel batch: {str(e)}")
 
-@router.get("/stats", response_model=ServiceStatsResponse)
+@router.get("/stats", response_model=None, responses={200: {"model": ServiceStatsResponse}})
 async def get_service_stats(
     service: BatchProcessingService = Depends(get_batch_service)
 ):
@@ -327,13 +576,14 @@ async def get_service_stats(
     - Success rates
     - Service health
     """
-    try:
-        stats = await service.get_service_stats()
-        return ServiceStatsResponse(**stats)
-        
-    except Exception as e:
-        logger.error(f"Failed to get service stats: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to get service stats: {str(e)}")
+    # Sampled snapshot from the service (get_service_stats logs its own
+    # failures and returns an empty dict) plus the router's in-flight count
+    stats = await service.get_service_stats_snapshot()
+    if not stats:
+        raise HTTPException(status_code=500, detail="Failed to get service stats: Service statistics unavailable")
+    
+    stats["inflight_create_requests"] = create_gate.inflight
+    return Response(content=orjson.dumps(stats), media_type="application/json")
 
 @router.get("/list")
 async def list_batches(
@@ -349,64 +599,79 @@ async def list_batches(
     Use the status endpoint to get detailed information about a specific batch.
     """
     try:
-        # Get all batches
-        all_batches = []
-        for batch_id, batch_request in service.batch_requests.items():
-            batch_info = {
+        status_filter = None
+        if status:
+            try:
+                status_filter = JobStatus(status.lower())
+            except ValueError:
+                return {
+                    'batches': [],
+                    'total_count': 0,
+                    'limit': limit,
+                    'offset': offset,
+                    'has_more': False
+                }
+        
+        # Page through the service's creation-time index (newest first)
+        page, total_count = service.list_batch_requests(
+            status=status_filter,
+            offset=offset,
+            limit=limit
+        )
+        
+        batches = (
+            {
                 'id': batch_request.id,
                 'name': batch_request.name,
                 'status': batch_request.status.value,
                 'total_jobs': batch_request.total_jobs,
                 'completed_jobs': batch_request.completed_jobs,
                 'failed_jobs': batch_request.failed_jobs,
-                'created_at': batch_request.created_at.isoformat(),
+                'created_at': batch_request.created_at_iso,
                 'estimated_duration': batch_request.estimated_duration,
                 'actual_duration': batch_request.actual_duration
             }
-            all_batches.append(batch_info)
-        
-        # Filter by status if specified
-        if status:
-            status_filter = status.lower()
-            all_batches = [b for b in all_batches if b['status'] == status_filter]
-        
-        # Sort by creation time (newest first)
-        all_batches.sort(key=lambda x: x['created_at'], reverse=True)
-        
-        # Apply pagination
-        total_count = len(all_batches)
-        batches = all_batches[offset:offset + limit]
+            for batch_request in page
+        )
         
-        return {
-            'batches': batches,
+        # Remaining top-level fields, spliced in after the batches array
+        tail = orjson.dumps({
             'total_count': total_count,
             'limit': limit,
             'offset': offset,
             'has_more': offset + limit < total_count
-        }
+        })
+        
+        return StreamingResponse(
+            _stream_json_array(batches, prefix=b'{"batches":[', suffix=b'],' + tail[1:]),
+            media_type="application/json"
+        )
         
     except Exception as e:
-        logger.error(f"Failed to list batches: {e}")
+        logger.error("Failed to list batches: %s", e)
         raise HTTPException(status_code=500, detail=f"Failed to list batches: {str(e)}")
 
-@router.post("/cleanup")
+@router.post("/cleanup", status_code=202)
 async def cleanup_old_batches(
     days_old: int = Query(7, ge=1, le=365, description="Remove batches older than this many days"),
     service: BatchProcessingService = Depends(get_batch_service)
 ):
     """
-    Clean up old completed batches
+    Schedule a cleanup of old completed batches
     
     Removes batches that are completed, failed, or cancelled and older than the specified number of days.
-    This helps keep the system clean and reduces memory usage.
+    The cleanup runs on the service's background thread; this endpoint returns immediately.
     """
     try:
-        await service.cleanup_old_batches(days_old=days_old)
-        return {"message": f"Cleanup completed for batches older than {days_old} days"}
+        service.request_cleanup(days_old=days_old)
+        return ORJSONResponse(
+            {"message": f"Cleanup scheduled for batches older than {days_old} days"},
+            status_code=202
+        )
         
     except Exception as e:
-        logger.error(f"Failed to cleanup batches: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to cleanup batches: {str(e)}")
+        logger.error("Failed to schedule batch cleanup: %s", e)
+        raise HTTPException(status_code=500, detail=f"Failed to schedule batch cleanup: {str(e)}")
 
 @router.get("/health")
 async def health_check(
@@ -433,13 +698,13 @@ async def health_check(
             'queue_size': stats.get('queue_size', 0),
             'active_workers': stats.get('active_workers', 0),
             'success_rate': stats.get('success_rate', 0),
-            'timestamp': datetime.now().isoformat()
+            'timestamp': _iso_now()
         }
         
     except Exception as e:
-        logger.error(f"Health check failed: {e}")
+        logger.error("Health check failed: %s", e)
         return {
             'status': 'unhealthy',
             'error': str(e),
-            'timestamp': datetime.now().isoformat()
+            'timestamp': _iso_now()
         }
\ No newline at end of file
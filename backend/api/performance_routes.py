@@ -4,10 +4,27 @@ Provides endpoints for system performance monitoring and optimization
 """
 
 from fastapi import APIRouter, HTTPException, Query, Depends
-from typing import List, Dict, Optional, Any
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from typing import List, Dict, Optional, Any, AsyncIterator, Iterator
 from pydantic import BaseModel, Field
+from collections import Counter
 from datetime import datetime
+from functools import lru_cache
+from operator import itemgetter
+import asyncio
 import logging
+import platform
+import time
+
+import numpy as np
+import orjson
+import psutil
+
+try:
+    import GPUtil
+    GPUTIL_AVAILABLE = True
+except ImportError:
+    GPUTIL_AVAILABLE = False
 
 from services.performance_service import PerformanceMonitor
 
@@ -15,19 +32,62 @@ from services.performance_service import PerformanceMonitor
 logger = logging.getLogger(__name__)
 
 # Initialize router
-router = APIRouter(prefix="/api/performance", tags=["performance"])
+router = APIRouter(prefix="/api/performance", tags=["performance"], default_response_class=ORJSONResponse)
 
-# Initialize performance monitor (singleton)
-performance_monitor = None
+# Extracts the (cpu, memory) columns used for summary trends
+_get_trend_columns = itemgetter('cpu_percent', 'memory_percent')
+
+# Extracts the level used for summary alert counts
+_get_alert_level = itemgetter('level')
+
+# Last (epoch second, ISO string) pair handed out by _now_iso
+_last_timestamp = [0, ""]
+
+def _now_iso() -> str:
+    """Current time as an ISO string at one-second resolution"""
+    now = int(time.time())
+    if now != _last_timestamp[0]:
+        _last_timestamp[1] = datetime.fromtimestamp(now).isoformat()
+        _last_timestamp[0] = now
+    return _last_timestamp[1]
+
+async def _stream_metrics_history(system_samples: Iterator[Dict[str, Any]],
+                                  process_samples: Iterator[Dict[str, Any]],
+                                  hours: int) -> AsyncIterator[bytes]:
+    """Yield the metrics history document one serialized sample at a time"""
+    # The status line has already been sent, so a failure can only be logged
+    # and the document left truncated
+    try:
+        total_points = 0
+        yield b'{"system_metrics":['
+        for sample in system_samples:
+            if total_points:
+                yield b','
+            yield orjson.dumps(sample)
+            total_points += 1
+        
+        yield b'],"process_metrics":['
+        first = True
+        for sample in process_samples:
+            if not first:
+                yield b','
+            yield orjson.dumps(sample)
+            first = False
+        
+        yield b'],"period_hours":%d,"total_points":%d}' % (hours, total_points)
+    
+    except Exception:
+        logger.exception("Metrics history stream failed")
+        raise
 
-def get_performance_monitor():
+# Initialize performance monitor (singleton)
+@lru_cache(maxsize=1)
+def get_performance_monitor() -> PerformanceMonitor:
     """Get performance monitor instance"""
-    global performance_monitor
-    if performance_monitor is None:
-        performance_monitor = PerformanceMonitor()
-    return performance_monitor
+    return PerformanceMonitor()
 
-# Pydantic models for responses
+# Pydantic models for responses (OpenAPI documentation only; endpoints return
+# the monitor's dicts as-is)
 
 class SystemMetricsResponse(BaseModel):
     """System metrics response"""
@@ -119,7 +179,7 @@ class MemoryOptimizationResponse(BaseModel):
 
 # API Endpoints
 
-@router.get("/current", response_model=CurrentMetricsResponse)
+@router.get("/current", response_model=None, responses={200: {"model": CurrentMetricsResponse}})
 async def get_current_metrics(
     monitor: PerformanceMonitor = Depends(get_performance_monitor)
 ):
@@ -137,20 +197,11 @@ async def get_current_metrics(
     try:
         metrics = await monitor.get_current_metrics()
         
-        # Convert to response format
-        system_metrics = None
-        if metrics.get('system'):
-            system_metrics = SystemMetricsResponse(**metrics['system'])
-        
-        process_metrics = None
-        if metrics.get('process'):
-            process_metrics = ProcessMetricsResponse(**metrics['process'])
-        
-        return CurrentMetricsResponse(
-            timestamp=metrics['timestamp'],
-            system=system_metrics,
-            process=process_metrics
-        )
+        return {
+            'timestamp': metrics['timestamp'],
+            'system': metrics.get('system'),
+            'process': metrics.get('process')
+        }
         
     except Exception as e:
         logger.error(f"Failed to get current metrics: {e}")
@@ -166,16 +217,24 @@ async def get_metrics_history(
     
     Returns performance metrics history for the specified time period.
     Useful for creating performance charts and trend analysis.
+    The response is streamed sample by sample rather than built in memory.
     """
     try:
-        history = await monitor.get_metrics_history(hours=hours)
-        return history
+        # Snapshot both histories before the response starts, so errors here
+        # still become a 500
+        system_samples = monitor.iter_history(hours=hours, kind='system')
+        process_samples = monitor.iter_history(hours=hours, kind='process')
         
     except Exception as e:
         logger.error(f"Failed to get metrics history: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to get metrics history: {str(e)}")
+    
+    return StreamingResponse(
+        _stream_metrics_history(system_samples, process_samples, hours),
+        media_type="application/json"
+    )
 
-@router.get("/alerts", response_model=List[AlertResponse])
+@router.get("/alerts", response_model=None, responses={200: {"model": List[AlertResponse]}})
 async def get_alerts(
     hours: int = Query(24, ge=1, le=168, description="Number of hours of alerts to retrieve"),
     level: Optional[str] = Query(None, description="Filter by alert level (warning/critical)"),
@@ -189,25 +248,13 @@ async def get_alerts(
     Alerts are generated when system metrics exceed configured thresholds.
     """
     try:
-        alerts = await monitor.get_alerts(hours=hours)
-        
-        # Apply filters
-        if level:
-            alerts = [a for a in alerts if a['level'] == level.lower()]
-        
-        if category:
-            alerts = [a for a in alerts if a['category'] == category.lower()]
-        
-        # Convert to response format
-        alert_responses = [AlertResponse(**alert) for alert in alerts]
-        
-        return alert_responses
+        return await monitor.get_alerts(hours=hours, level=level, category=category)
         
     except Exception as e:
         logger.error(f"Failed to get alerts: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to get alerts: {str(e)}")
 
-@router.get("/stats", response_model=PerformanceStatsResponse)
+@router.get("/stats", response_model=None, responses={200: {"model": PerformanceStatsResponse}})
 async def get_performance_stats(
     monitor: PerformanceMonitor = Depends(get_performance_monitor)
 ):
@@ -222,13 +269,13 @@ async def get_performance_stats(
     """
     try:
         stats = await monitor.get_performance_stats()
-        return PerformanceStatsResponse(**stats)
+        return stats
         
     except Exception as e:
         logger.error(f"Failed to get performance stats: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to get performance stats: {str(e)}")
 
-@router.get("/recommendations", response_model=List[OptimizationRecommendation])
+@router.get("/recommendations", response_model=None, responses={200: {"model": List[OptimizationRecommendation]}})
 async def get_optimization_recommendations(
     monitor: PerformanceMonitor = Depends(get_performance_monitor)
 ):
@@ -240,13 +287,13 @@ async def get_optimization_recommendations(
     """
     try:
         recommendations = await monitor.get_optimization_recommendations()
-        return [OptimizationRecommendation(**rec) for rec in recommendations]
+        return recommendations
         
     except Exception as e:
         logger.error(f"Failed to get optimization recommendations: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to get optimization recommendations: {str(e)}")
 
-@router.post("/cleanup", response_model=CleanupResponse)
+@router.post("/cleanup", response_model=None, responses={200: {"model": CleanupResponse}})
 async def trigger_cleanup(
     monitor: PerformanceMonitor = Depends(get_performance_monitor)
 ):
@@ -262,13 +309,10 @@ async def trigger_cleanup(
     try:
         cleanup_result = await monitor.trigger_cleanup()
         
-        # Convert to response format
-        operations = [CleanupOperation(**op) for op in cleanup_result['operations']]
-        
-        return CleanupResponse(
-            timestamp=cleanup_result['timestamp'],
-            operations=operations
-        )
+        return {
+            'timestamp': cleanup_result['timestamp'],
+            'operations': cleanup_result['operations']
+        }
         
     except Exception as e:
         logger.error(f"Failed to trigger cleanup: {e}")
@@ -284,31 +328,36 @@ async def performance_health_check(
     Returns the health status of the performance monitoring system.
     """
     try:
-        current_metrics = await monitor.get_current_metrics()
         stats = await monitor.get_performance_stats()
+        is_monitoring = stats.get('is_monitoring', False)
         
         # Determine health status
         is_healthy = True
         issues = []
         
-        if current_metrics.get('system'):
-            system = current_metrics['system']
+        # Resource thresholds are only sampled while monitoring is active;
+        # otherwise the check is already failing and the sample is skipped
+        if is_monitoring:
+            system = await monitor.get_current_thresholds_only()
+            cpu_percent = system.get('cpu_percent', 0)
+            memory_percent = system.get('memory_percent', 0)
+            disk_usage_percent = system.get('disk_usage_percent', 0)
             
             # Check critical thresholds
-            if system.get('cpu_percent', 0) > 95:
+            if cpu_percent > 95:
                 is_healthy = False
                 issues.append("Critical CPU usage")
             
-            if system.get('memory_percent', 0) > 95:
+            if memory_percent > 95:
                 is_healthy = False
                 issues.append("Critical memory usage")
             
-            if system.get('disk_usage_percent', 0) > 98:
+            if disk_usage_percent > 98:
                 is_healthy = False
                 issues.append("Critical disk usage")
         
         # Check monitoring status
-        if not stats.get('is_monitoring', False):
+        if not is_monitoring:
             is_healthy = False
             issues.append("Performance monitoring not active")
         
@@ -320,12 +369,12 @@ async def performance_health_check(
         
         return {
             'status': 'healthy' if is_healthy else 'unhealthy',
-            'is_monitoring': stats.get('is_monitoring', False),
+            'is_monitoring': is_monitoring,
             'issues': issues,
             'uptime_hours': stats.get('uptime_hours', 0),
             'total_alerts': stats.get('total_alerts', 0),
             'critical_alerts': stats.get('critical_alerts', 0),
-            'timestamp': datetime.now().isoformat()
+            'timestamp': _now_iso()
         }
         
     except Exception as e:
@@ -333,7 +382,7 @@ async def performance_health_check(
         return {
             'status': 'unhealthy',
             'error': str(e),
-            'timestamp': datetime.now().isoformat()
+            'timestamp': _now_iso()
         }
 
 @router.get("/summary")
@@ -347,45 +396,36 @@ async def get_performance_summary(
     current metrics, recent trends, and key indicators.
     """
     try:
-        # Get current metrics
-        current = await monitor.get_current_metrics()
-        
-        # Get recent history (last 4 hours)
-        history = await monitor.get_metrics_history(hours=4)
-        
-        # Get recent alerts
-        alerts = await monitor.get_alerts(hours=24)
-        
-        # Get stats
-        stats = await monitor.get_performance_stats()
+        # Get current metrics, recent history (last 4 hours), recent alerts
+        # and stats concurrently
+        current, history, alerts, stats = await asyncio.gather(
+            monitor.get_current_metrics(),
+            monitor.get_metrics_history(hours=4),
+            monitor.get_alerts(hours=24),
+            monitor.get_performance_stats()
+        )
         
-        # Calculate trends
+        # Calculate trends (compare the average of the first and second half)
         trends = {}
-        if history.get('system_metrics'):
-            metrics = history['system_metrics']
-            if len(metrics) >= 2:
-                # Calculate average for first and second half
-                mid_point = len(metrics) // 2
-                first_half = metrics[:mid_point]
-                second_half = metrics[mid_point:]
-                
-                if first_half and second_half:
-                    first_avg_cpu = sum(m['cpu_percent'] for m in first_half) / len(first_half)
-                    second_avg_cpu = sum(m['cpu_percent'] for m in second_half) / len(second_half)
-                    trends['cpu_trend'] = 'increasing' if second_avg_cpu > first_avg_cpu else 'decreasing'
-                    
-                    first_avg_memory = sum(m['memory_percent'] for m in first_half) / len(first_half)
-                    second_avg_memory = sum(m['memory_percent'] for m in second_half) / len(second_half)
-                    trends['memory_trend'] = 'increasing' if second_avg_memory > first_avg_memory else 'decreasing'
+        metrics = history.get('system_metrics')
+        if metrics and len(metrics) >= 2:
+            samples = np.array(
+                list(map(_get_trend_columns, metrics)),
+                dtype=np.float64
+            )
+            mid_point = len(samples) // 2
+            first_avg = samples[:mid_point].mean(axis=0)
+            second_avg = samples[mid_point:].mean(axis=0)
+            
+            trends['cpu_trend'] = 'increasing' if second_avg[0] > first_avg[0] else 'decreasing'
+            trends['memory_trend'] = 'increasing' if second_avg[1] > first_avg[1] else 'decreasing'
         
         # Count alerts by level
-        alert_counts = {
-            'warning': len([a for a in alerts if a['level'] == 'warning']),
-            'critical': len([a for a in alerts if a['level'] == 'critical'])
-        }
+        level_counts = Counter(map(_get_alert_level, alerts))
+        alert_counts = {'warning': level_counts['warning'], 'critical': level_counts['critical']}
         
         return {
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': _now_iso(),
             'current_metrics': current,
             'trends': trends,
             'alert_counts': alert_counts,
@@ -397,8 +437,77 @@ async def get_performance_summary(
         logger.error(f"Failed to get performance summary: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to get performance summary: {str(e)}")
 
+# Seconds before the volatile part of /system-info is sampled again
+SYSTEM_INFO_TTL = 30.0
+
+# Last (monotonic time, volatile system info) pair
+_volatile_system_info = [0.0, None]
+
+# Platform details never change for the lifetime of the process, so they
+# are computed once at import
+_PLATFORM_INFO = {
+    'system': platform.system(),
+    'release': platform.release(),
+    'version': platform.version(),
+    'machine': platform.machine(),
+    'processor': platform.processor(),
+    'architecture': platform.architecture(),
+    'hostname': platform.node()
+}
+
+_PHYSICAL_CORES = psutil.cpu_count(logical=False)
+_LOGICAL_CORES = psutil.cpu_count(logical=True)
+
+def _sample_volatile_system_info() -> Dict[str, Any]:
+    """System information read from psutil (frequency, memory, disk, network, GPUs)"""
+    # One call per resource; totals come from the same readings as the
+    # current values
+    cpu_freq = psutil.cpu_freq()
+    memory = psutil.virtual_memory()
+    disk = psutil.disk_usage('/')
+    net_addrs = psutil.net_if_addrs()
+    
+    info = {
+        'max_frequency': cpu_freq.max if cpu_freq else None,
+        'current_frequency': cpu_freq.current if cpu_freq else None,
+        'memory_total_gb': memory.total / (1024**3),
+        'memory_available_gb': memory.available / (1024**3),
+        'disk_total_gb': disk.total / (1024**3),
+        'disk_free_gb': disk.free / (1024**3),
+        'interfaces': list(net_addrs.keys())
+    }
+    
+    # Add GPU information if available
+    if GPUTIL_AVAILABLE:
+        try:
+            gpus = GPUtil.getGPUs()
+            if gpus:
+                info['gpu'] = [
+                    {
+                        'id': gpu.id,
+                        'name': gpu.name,
+                        'memory_total_gb': gpu.memoryTotal / 1024,
+                        'driver_version': gpu.driver
+                    }
+                    for gpu in gpus
+                ]
+        except Exception:
+            info['gpu'] = None
+    else:
+        info['gpu'] = None
+    
+    return info
+
+def _volatile_system_info_cached() -> Dict[str, Any]:
+    """Volatile system information, resampled at most every SYSTEM_INFO_TTL seconds"""
+    now = time.monotonic()
+    if _volatile_system_info[1] is None or now - _volatile_system_info[0] > SYSTEM_INFO_TTL:
+        _volatile_system_info[1] = _sample_volatile_system_info()
+        _volatile_system_info[0] = now
+    return _volatile_system_info[1]
+
 @router.get("/system-info")
-async def get_system_info():
+def get_system_info():
     """
     Get system information
     
@@ -406,55 +515,31 @@ async def get_system_info():
     OS details, and available resources.
     """
     try:
-        import platform
-        import psutil
+        volatile_info = _volatile_system_info_cached()
         
-        # Get system information
         system_info = {
-            'platform': {
-                'system': platform.system(),
-                'release': platform.release(),
-                'version': platform.version(),
-                'machine': platform.machine(),
-                'processor': platform.processor(),
-                'architecture': platform.architecture(),
-                'hostname': platform.node()
-            },
+            'platform': _PLATFORM_INFO,
             'cpu': {
-                'physical_cores': psutil.cpu_count(logical=False),
-                'logical_cores': psutil.cpu_count(logical=True),
-                'max_frequency': psutil.cpu_freq().max if psutil.cpu_freq() else None,
-                'current_frequency': psutil.cpu_freq().current if psutil.cpu_freq() else None
+                'physical_cores': _PHYSICAL_CORES,
+                'logical_cores': _LOGICAL_CORES,
+                'max_frequency': volatile_info['max_frequency'],
+                'current_frequency': volatile_info['current_frequency']
             },
             'memory': {
-                'total_gb': psutil.virtual_memory().total / (1024**3),
-                'available_gb': psutil.virtual_memory().available / (1024**3)
+                'total_gb': volatile_info['memory_total_gb'],
+                'available_gb': volatile_info['memory_available_gb']
             },
             'disk': {
-                'total_gb': psutil.disk_usage('/').total / (1024**3),
-                'free_gb': psutil.disk_usage('/').free / (1024**3)
+                'total_gb': volatile_info['disk_total_gb'],
+                'free_gb': volatile_info['disk_free_gb']
             },
             'network': {
-                'interfaces': list(psutil.net_if_addrs().keys())
+                'interfaces': volatile_info['interfaces']
             }
         }
         
-        # Add GPU information if available
-        try:
-            import GPUtil
-            gpus = GPUtil.getGPUs()
-            if gpus:
-                gpu_info = []
-                for gpu in gpus:
-                    gpu_info.append({
-                        'id': gpu.id,
-                        'name': gpu.name,
-                        'memory_total_gb': gpu.memoryTotal / 1024,
-                        'driver_version': gpu.driver
-                    })
-                system_info['gpu'] = gpu_info
-        except Exception:
-            system_info['gpu'] = None
+        if 'gpu' in volatile_info:
+            system_info['gpu'] = volatile_info['gpu']
         
         return system_info
         
@@ -462,7 +547,7 @@ async def get_system_info():
         logger.error(f"Failed to get system info: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to get system info: {str(e)}")
 
-@router.post("/optimize-memory", response_model=MemoryOptimizationResponse)
+@router.post("/optimize-memory", response_model=None, responses={200: {"model": MemoryOptimizationResponse}})
 async def optimize_memory(
     monitor: PerformanceMonitor = Depends(get_performance_monitor)
 ):
@@ -481,18 +566,13 @@ async def optimize_memory(
     try:
         result = await monitor.optimize_memory_usage()
         
-        # Convert operations to response format
-        operations = [
-            CleanupOperation(**op) for op in result['operations']
-        ]
-        
-        return MemoryOptimizationResponse(
-            timestamp=result['timestamp'],
-            operations=operations,
-            memory_before=result['memory_before'],
-            memory_after=result['memory_after'],
-            memory_freed_mb=result['memory_freed_mb']
-        )
+        return {
+            'timestamp': result['timestamp'],
+            'operations': result['operations'],
+            'memory_before': result['memory_before'],
+            'memory_after': result['memory_after'],
+            'memory_freed_mb': result['memory_freed_mb']
+        }
         
     except Exception as e:
         logger.error(f"Failed to optimize memory: {e}")
@@ -3,11 +3,18 @@ Quality Presets API Routes
 Provides endpoints for managing video and audio quality presets
 """
 
-from fastapi import APIRouter, HTTPException, Query, Depends
-from typing import List, Dict, Optional, Any
+from fastapi import APIRouter, HTTPException, Query, Depends, Response
+from fastapi.responses import ORJSONResponse
+from typing import List, Dict, Optional, Any, Callable
 from pydantic import BaseModel, Field
+from types import MappingProxyType
 from datetime import datetime
+from functools import lru_cache
+import heapq
 import logging
+import time
+
+import orjson
 
 from services.quality_presets_service import (
     QualityPresetsService, 
@@ -21,7 +28,67 @@ from services.quality_presets_service import (
 logger = logging.getLogger(__name__)
 
 # Initialize router
-router = APIRouter(prefix="/api/quality", tags=["quality"])
+router = APIRouter(prefix="/api/quality", tags=["quality"], default_response_class=ORJSONResponse)
+
+# Display rank of each level value, best quality first
+_LEVEL_RANK = MappingProxyType({"ultra": 0, "high": 1, "medium": 2, "low": 3, "draft": 4})
+
+# Quality levels from lowest to highest, used for level adjacency
+_LEVEL_ORDER = (QualityLevel.DRAFT, QualityLevel.LOW, QualityLevel.MEDIUM, QualityLevel.HIGH, QualityLevel.ULTRA)
+
+# Position of each level in _LEVEL_ORDER
+_LEVEL_INDEX = MappingProxyType({level: i for i, level in enumerate(_LEVEL_ORDER)})
+
+# Rank of each level value from lowest to highest quality
+_LEVEL_ASCENDING_RANK = MappingProxyType({level.value: i for i, level in enumerate(_LEVEL_ORDER)})
+
+# Built-in presets the health check expects to find
+_DEFAULT_PRESET_IDS = frozenset({"ultra_4k", "high_1080p", "medium_720p", "low_480p", "draft_360p"})
+
+# Last (epoch second, ISO string) pair handed out by _now_iso
+_last_timestamp = [0, ""]
+
+def _now_iso() -> str:
+    """Current time as an ISO string at one-second resolution"""
+    now = int(time.time())
+    if now != _last_timestamp[0]:
+        _last_timestamp[1] = datetime.fromtimestamp(now).isoformat()
+        _last_timestamp[0] = now
+    return _last_timestamp[1]
+
+# Static /levels response, serialized once at import
+_QUALITY_LEVELS_JSON = orjson.dumps({"levels": [
+    {
+        "id": "ultra",
+        "name": "Ultra Quality",
+        "description": "Maximum quality for professional use",
+        "characteristics": ["Highest file size", "Longest processing time", "Best quality"]
+    },
+    {
+        "id": "high",
+        "name": "High Quality",
+        "description": "Excellent quality for streaming and sharing",
+        "characteristics": ["Large file size", "Moderate processing time", "Excellent quality"]
+    },
+    {
+        "id": "medium",
+        "name": "Medium Quality",
+        "description": "Balanced quality and file size",
+        "characteristics": ["Moderate file size", "Fast processing", "Good quality"]
+    },
+    {
+        "id": "low",
+        "name": "Low Quality",
+        "description": "Small file size for mobile and low bandwidth",
+        "characteristics": ["Small file size", "Very fast processing", "Acceptable quality"]
+    },
+    {
+        "id": "draft",
+        "name": "Draft Quality",
+        "description": "Fast processing for previews",
+        "characteristics": ["Minimal file size", "Fastest processing", "Preview quality"]
+    }
+]})
 
 # Initialize quality presets service (singleton)
 quality_service = None
@@ -33,7 +100,8 @@ def get_quality_service():
         quality_service = QualityPresetsService()
     return quality_service
 
-# Pydantic models for requests and responses
+# Pydantic models for requests and responses (response models are used for
+# OpenAPI documentation; endpoints return plain dicts)
 
 class VideoQualitySettingsResponse(BaseModel):
     """Video quality settings response"""
@@ -146,6 +214,13 @@ class FFmpegArgsResponse(BaseModel):
 
 def format_duration(seconds: float) -> str:
     """Format duration in human-readable format"""
+    # Estimates are already rounded to 0.1s, so this rarely changes the input
+    # and keeps the memoized set of values small
+    return _format_duration(round(seconds, 1))
+
+@lru_cache(maxsize=1024)
+def _format_duration(seconds: float) -> str:
+    """Format a duration (rounded to 0.1s); memoized by format_duration"""
     if seconds < 60:
         return f"{seconds:.1f} seconds"
     elif seconds < 3600:
@@ -155,37 +230,75 @@ def format_duration(seconds: float) -> str:
         hours = seconds / 3600
         return f"{hours:.1f} hours"
 
-def convert_preset_to_response(preset: QualityPreset) -> QualityPresetResponse:
-    """Convert QualityPreset to response model"""
-    return QualityPresetResponse(
-        name=preset.name,
-        description=preset.description,
-        level=preset.level.value,
-        video=VideoQualitySettingsResponse(**preset.video.__dict__),
-        audio=AudioQualitySettingsResponse(**preset.audio.__dict__),
-        use_case=preset.use_case,
-        estimated_file_size_factor=preset.estimated_file_size_factor,
-        processing_time_factor=preset.processing_time_factor
-    )
-
-def convert_preset_to_summary(preset_id: str, preset: QualityPreset) -> QualityPresetSummary:
-    """Convert QualityPreset to summary model"""
-    return QualityPresetSummary(
-        id=preset_id,
-        name=preset.name,
-        description=preset.description,
-        level=preset.level.value,
-        use_case=preset.use_case,
-        resolution=preset.video.resolution,
-        video_codec=preset.video.codec,
-        audio_codec=preset.audio.codec,
-        estimated_file_size_factor=preset.estimated_file_size_factor,
-        processing_time_factor=preset.processing_time_factor
-    )
+def convert_preset_to_response(preset: QualityPreset) -> Dict[str, Any]:
+    """
+    Convert QualityPreset to a QualityPresetResponse-shaped dict
+    
+    The settings dataclasses have the same fields as their response models,
+    so their instance dicts are copied as-is instead of going through a model.
+    """
+    return {
+        'name': preset.name,
+        'description': preset.description,
+        'level': preset.level.value,
+        'video': dict(preset.video.__dict__),
+        'audio': dict(preset.audio.__dict__),
+        'use_case': preset.use_case,
+        'estimated_file_size_factor': preset.estimated_file_size_factor,
+        'processing_time_factor': preset.processing_time_factor
+    }
+
+def convert_preset_to_summary(preset_id: str, preset: QualityPreset) -> Dict[str, Any]:
+    """Convert QualityPreset to a QualityPresetSummary-shaped dict"""
+    return {
+        'id': preset_id,
+        'name': preset.name,
+        'description': preset.description,
+        'level': preset.level.value,
+        'use_case': preset.use_case,
+        'resolution': preset.video.resolution,
+        'video_codec': preset.video.codec,
+        'audio_codec': preset.audio.codec,
+        'estimated_file_size_factor': preset.estimated_file_size_factor,
+        'processing_time_factor': preset.processing_time_factor
+    }
+
+# Preset summaries (sorted) as plain dicts plus serialized read responses keyed
+# by (endpoint, key), rebuilt when the service's preset version changes
+_preset_views: Dict[str, Any] = {'version': None, 'summaries': [], 'serialized': {}}
+
+def get_preset_views(service: QualityPresetsService) -> Dict[str, Any]:
+    """Get cached preset views for the service's current preset version"""
+    if _preset_views['version'] != service.version:
+        summaries = [
+            convert_preset_to_summary(preset_id, preset)
+            for preset_id, preset in service.get_all_presets().items()
+        ]
+        
+        # Sort by level and name
+        summaries.sort(key=lambda x: (_LEVEL_RANK.get(x['level'], 5), x['name']))
+        
+        _preset_views['summaries'] = summaries
+        _preset_views['serialized'] = {}
+        _preset_views['version'] = service.version
+    
+    return _preset_views
+
+def cached_json_response(views: Dict[str, Any], key: tuple, build: Callable[[], Any]) -> Response:
+    """
+    Serve a read response from the serialized view cache, building it on a miss
+    
+    build may raise (e.g. a 404); nothing is cached in that case.
+    """
+    serialized = views['serialized']
+    body = serialized.get(key)
+    if body is None:
+        body = serialized[key] = orjson.dumps(build())
+    return Response(content=body, media_type="application/json")
 
 # API Endpoints
 
-@router.get("/presets", response_model=List[QualityPresetSummary])
+@router.get("/presets", response_model=None, responses={200: {"model": List[QualityPresetSummary]}})
 async def get_all_presets(
     level: Optional[str] = Query(None, description="Filter by quality level"),
     service: QualityPresetsService = Depends(get_quality_service)
@@ -197,38 +310,28 @@ async def get_all_presets(
     Optionally filter by quality level.
     """
     try:
-        all_presets = service.get_all_presets()
+        views = get_preset_views(service)
+        summaries = views['summaries']
         
         # Filter by level if specified
         if level:
             try:
                 quality_level = QualityLevel(level.lower())
-                filtered_presets = {
-                    pid: preset for pid, preset in all_presets.items()
-                    if preset.level == quality_level
-                }
             except ValueError:
                 raise HTTPException(status_code=400, detail=f"Invalid quality level: {level}")
-        else:
-            filtered_presets = all_presets
-        
-        # Convert to summary format
-        summaries = [
-            convert_preset_to_summary(preset_id, preset)
-            for preset_id, preset in filtered_presets.items()
-        ]
-        
-        # Sort by level and name
-        level_order = {"ultra": 0, "high": 1, "medium": 2, "low": 3, "draft": 4}
-        summaries.sort(key=lambda x: (level_order.get(x.level, 5), x.name))
+            
+            return cached_json_response(
+                views, ('presets', quality_level.value),
+                lambda: [s for s in summaries if s['level'] == quality_level.value]
+            )
         
-        return summaries
+        return cached_json_response(views, ('presets', None), lambda: summaries)
         
     except Exception as e:
         logger.error(f"Failed to get presets: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to get presets: {str(e)}")
 
-@router.get("/presets/{preset_id}", response_model=QualityPresetResponse)
+@router.get("/presets/{preset_id}", response_model=None, responses={200: {"model": QualityPresetResponse}})
 async def get_preset(
     preset_id: str,
     service: QualityPresetsService = Depends(get_quality_service)
@@ -239,11 +342,14 @@ async def get_preset(
     Returns complete configuration details for the specified preset.
     """
     try:
-        preset = service.get_preset(preset_id)
-        if not preset:
-            raise HTTPException(status_code=404, detail=f"Preset not found: {preset_id}")
+        def build_response() -> Dict[str, Any]:
+            preset = service.get_preset(preset_id)
+            if not preset:
+                raise HTTPException(status_code=404, detail=f"Preset not found: {preset_id}")
+            
+            return convert_preset_to_response(preset)
         
-        return convert_preset_to_response(preset)
+        return cached_json_response(get_preset_views(service), ('preset', preset_id), build_response)
         
     except HTTPException:
         raise
@@ -251,7 +357,7 @@ async def get_preset(
         logger.error(f"Failed to get preset {preset_id}: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to get preset: {str(e)}")
 
-@router.post("/presets", response_model=QualityPresetResponse)
+@router.post("/presets", response_model=None, responses={200: {"model": QualityPresetResponse}})
 async def create_custom_preset(
     request: CreatePresetRequest,
     service: QualityPresetsService = Depends(get_quality_service)
@@ -271,8 +377,8 @@ async def create_custom_preset(
             raise HTTPException(status_code=409, detail=f"Preset already exists: {preset_id}")
         
         # Convert request to preset object
-        video_settings = VideoQualitySettings(**request.video.dict())
-        audio_settings = AudioQualitySettings(**request.audio.dict())
+        video_settings = VideoQualitySettings(**request.video.model_dump())
+        audio_settings = AudioQualitySettings(**request.audio.model_dump())
         
         preset = QualityPreset(
             name=request.name,
@@ -325,7 +431,7 @@ async def delete_preset(
         logger.error(f"Failed to delete preset {preset_id}: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to delete preset: {str(e)}")
 
-@router.post("/estimate", response_model=EstimationResponse)
+@router.post("/estimate", response_model=None, responses={200: {"model": EstimationResponse}})
 async def estimate_output(
     request: EstimationRequest,
     service: QualityPresetsService = Depends(get_quality_service)
@@ -342,26 +448,26 @@ async def estimate_output(
             raise HTTPException(status_code=404, detail=f"Preset not found: {request.preset_id}")
         
         # Calculate estimates
-        estimated_size = service.estimate_file_size(
-            request.preset_id,
+        estimated_size = service.estimate_file_size_for_preset(
+            preset,
             request.duration_seconds,
             request.input_file_size_mb
         )
         
-        estimated_time = service.estimate_processing_time(
-            request.preset_id,
+        estimated_time = service.estimate_processing_time_for_preset(
+            preset,
             request.duration_seconds,
             request.input_resolution
         )
         
-        return EstimationResponse(
-            preset_id=request.preset_id,
-            preset_name=preset.name,
-            duration_seconds=request.duration_seconds,
-            estimated_file_size_mb=estimated_size,
-            estimated_processing_time_seconds=estimated_time,
-            estimated_processing_time_human=format_duration(estimated_time)
-        )
+        return {
+            'preset_id': request.preset_id,
+            'preset_name': preset.name,
+            'duration_seconds': request.duration_seconds,
+            'estimated_file_size_mb': estimated_size,
+            'estimated_processing_time_seconds': estimated_time,
+            'estimated_processing_time_human': format_duration(estimated_time)
+        }
         
     except HTTPException:
         raise
@@ -369,7 +475,7 @@ async def estimate_output(
         logger.error(f"Failed to estimate output: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to estimate output: {str(e)}")
 
-@router.post("/recommend", response_model=RecommendationResponse)
+@router.post("/recommend", response_model=None, responses={200: {"model": RecommendationResponse}})
 async def recommend_preset(
     request: RecommendationRequest,
     service: QualityPresetsService = Depends(get_quality_service)
@@ -394,52 +500,50 @@ async def recommend_preset(
         if not recommended_preset:
             raise HTTPException(status_code=500, detail="Recommended preset not found")
         
-        # Generate reasoning
-        reasoning_parts = [
-            f"Based on use case '{request.use_case}' and quality preference '{request.quality_preference}'"
-        ]
-        
-        if request.duration_seconds:
-            estimated_time = service.estimate_processing_time(recommended_id, request.duration_seconds)
-            reasoning_parts.append(f"Estimated processing time: {format_duration(estimated_time)}")
-        
-        if request.target_file_size_mb and request.duration_seconds:
-            estimated_size = service.estimate_file_size(recommended_id, request.duration_seconds)
-            if estimated_size > request.target_file_size_mb * 1.5:
-                reasoning_parts.append("Note: Estimated file size may exceed target")
+        # Estimate once up front (when a duration is given) and reuse below
+        duration = request.duration_seconds
+        estimated_time = service.estimate_processing_time_for_preset(recommended_preset, duration) if duration else None
+        exceeds_target = bool(
+            duration and request.target_file_size_mb
+            and service.estimate_file_size_for_preset(recommended_preset, duration) > request.target_file_size_mb * 1.5
+        )
         
-        reasoning = ". ".join(reasoning_parts)
+        # Generate reasoning
+        reasoning = "".join((
+            f"Based on use case '{request.use_case}' and quality preference '{request.quality_preference}'",
+            f". Estimated processing time: {format_duration(estimated_time)}" if estimated_time is not None else "",
+            ". Note: Estimated file size may exceed target" if exceeds_target else ""
+        ))
         
         # Get alternatives (same level and adjacent levels)
         all_presets = service.get_all_presets()
         current_level = recommended_preset.level
         
         # Define level adjacency
-        level_order = [QualityLevel.DRAFT, QualityLevel.LOW, QualityLevel.MEDIUM, QualityLevel.HIGH, QualityLevel.ULTRA]
-        current_index = level_order.index(current_level)
-        
-        adjacent_levels = set([current_level])
-        if current_index > 0:
-            adjacent_levels.add(level_order[current_index - 1])
-        if current_index < len(level_order) - 1:
-            adjacent_levels.add(level_order[current_index + 1])
-        
-        alternatives = [
-            convert_preset_to_summary(pid, preset)
-            for pid, preset in all_presets.items()
-            if preset.level in adjacent_levels and pid != recommended_id
-        ]
+        current_index = _LEVEL_INDEX[current_level]
+        
+        # At most three levels, so a slice of the ordering is enough
+        adjacent_levels = _LEVEL_ORDER[max(0, current_index - 1):current_index + 2]
         
-        # Sort alternatives by level
-        level_order_dict = {"draft": 0, "low": 1, "medium": 2, "high": 3, "ultra": 4}
-        alternatives.sort(key=lambda x: (level_order_dict.get(x.level, 5), x.name))
+        candidates = (
+            (pid, preset) for pid, preset in all_presets.items()
+            if preset.level in adjacent_levels and pid != recommended_id
+        )
         
-        return RecommendationResponse(
-            recommended_preset_id=recommended_id,
-            preset=convert_preset_to_response(recommended_preset),
-            reasoning=reasoning,
-            alternatives=alternatives[:5]  # Limit to 5 alternatives
+        # Keep the first 5 alternatives by level and name; only those are
+        # converted to summaries
+        top_candidates = heapq.nsmallest(
+            5, candidates,
+            key=lambda item: (_LEVEL_ASCENDING_RANK.get(item[1].level.value, 5), item[1].name)
         )
+        alternatives = [convert_preset_to_summary(pid, preset) for pid, preset in top_candidates]
+        
+        return {
+            'recommended_preset_id': recommended_id,
+            'preset': convert_preset_to_response(recommended_preset),
+            'reasoning': reasoning,
+            'alternatives': alternatives
+        }
         
     except HTTPException:
         raise
@@ -447,7 +551,7 @@ async def recommend_preset(
         logger.error(f"Failed to recommend preset: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to recommend preset: {str(e)}")
 
-@router.get("/presets/{preset_id}/ffmpeg", response_model=FFmpegArgsResponse)
+@router.get("/presets/{preset_id}/ffmpeg", response_model=None, responses={200: {"model": FFmpegArgsResponse}})
 async def get_ffmpeg_args(
     preset_id: str,
     service: QualityPresetsService = Depends(get_quality_service)
@@ -459,27 +563,30 @@ async def get_ffmpeg_args(
     video and audio using the specified quality preset.
     """
     try:
-        preset = service.get_preset(preset_id)
-        if not preset:
-            raise HTTPException(status_code=404, detail=f"Preset not found: {preset_id}")
-        
-        video_args = service.get_ffmpeg_video_args(preset_id)
-        audio_args = service.get_ffmpeg_audio_args(preset_id)
-        
-        # Create complete command template
-        command_parts = ["ffmpeg", "-i", "INPUT_FILE"]
-        command_parts.extend(video_args)
-        command_parts.extend(audio_args)
-        command_parts.append("OUTPUT_FILE")
-        
-        complete_command = " ".join(command_parts)
+        def build_response() -> Dict[str, Any]:
+            preset = service.get_preset(preset_id)
+            if not preset:
+                raise HTTPException(status_code=404, detail=f"Preset not found: {preset_id}")
+            
+            video_args = service.get_ffmpeg_video_args_for_preset(preset)
+            audio_args = service.get_ffmpeg_audio_args_for_preset(preset)
+            
+            # Create complete command template
+            command_parts = ["ffmpeg", "-i", "INPUT_FILE"]
+            command_parts.extend(video_args)
+            command_parts.extend(audio_args)
+            command_parts.append("OUTPUT_FILE")
+            
+            complete_command = " ".join(command_parts)
+            
+            return {
+                'preset_id': preset_id,
+                'video_args': video_args,
+                'audio_args': audio_args,
+                'complete_command_template': complete_command
+            }
         
-        return FFmpegArgsResponse(
-            preset_id=preset_id,
-            video_args=video_args,
-            audio_args=audio_args,
-            complete_command_template=complete_command
-        )
+        return cached_json_response(get_preset_views(service), ('ffmpeg', preset_id), build_response)
         
     except HTTPException:
         raise
@@ -495,45 +602,7 @@ async def get_quality_levels():
     Returns information about all available quality levels
     and their characteristics.
     """
-    try:
-        levels = [
-            {
-                "id": "ultra",
-                "name": "Ultra Quality",
-                "description": "Maximum quality for professional use",
-                "characteristics": ["Highest file size", "Longest processing time", "Best quality"]
-            },
-            {
-                "id": "high",
-                "name": "High Quality",
-                "description": "Excellent quality for streaming and sharing",
-                "characteristics": ["Large file size", "Moderate processing time", "Excellent quality"]
-            },
-            {
-                "id": "medium",
-                "name": "Medium Quality",
-                "description": "Balanced quality and file size",
-                "characteristics": ["Moderate file size", "Fast processing", "Good quality"]
-            },
-            {
-                "id": "low",
-                "name": "Low Quality",
-                "description": "Small file size for mobile and low bandwidth",
-                "characteristics": ["Small file size", "Very fast processing", "Acceptable quality"]
-            },
-            {
-                "id": "draft",
-                "name": "Draft Quality",
-                "description": "Fast processing for previews",
-                "characteristics": ["Minimal file size", "Fastest processing", "Preview quality"]
-            }
-        ]
-        
-        return {"levels": levels}
-        
-    except Exception as e:
-        logger.error(f"Failed to get quality levels: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to get quality levels: {str(e)}")
+    return Response(content=_QUALITY_LEVELS_JSON, media_type="application/json")
 
 @router.get("/health")
 async def quality_health_check():
@@ -547,18 +616,17 @@ async def quality_health_check():
         all_presets = service.get_all_presets()
         
         # Check if default presets are available
-        default_presets = ["ultra_4k", "high_1080p", "medium_720p", "low_480p", "draft_360p"]
-        missing_defaults = [p for p in default_presets if p not in all_presets]
+        missing_defaults = sorted(_DEFAULT_PRESET_IDS - all_presets.keys())
         
         is_healthy = len(missing_defaults) == 0
         
         return {
             "status": "healthy" if is_healthy else "degraded",
             "total_presets": len(all_presets),
-            "default_presets_available": len(default_presets) - len(missing_defaults),
-            "custom_presets": len(all_presets) - (len(default_presets) - len(missing_defaults)),
+            "default_presets_available": len(_DEFAULT_PRESET_IDS) - len(missing_defaults),
+            "custom_presets": len(all_presets) - (len(_DEFAULT_PRESET_IDS) - len(missing_defaults)),
             "missing_defaults": missing_defaults,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": _now_iso()
         }
         
     except Exception as e:
@@ -566,5 +634,5 @@ async def quality_health_check():
         return {
             "status": "unhealthy",
             "error": str(e),
-            "timestamp": datetime.now().isoformat()
+            "timestamp": _now_iso()
         }
\ No newline at end of file
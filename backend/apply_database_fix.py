@@ -4,15 +4,89 @@ Apply database fix to Supabase
 This script applies the complete database schema fix
 """
 
+import mmap
 import os
 import sys
+from functools import lru_cache
+from itertools import islice
 from pathlib import Path
+from typing import Iterator
 from supabase import create_client, Client
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+# Statements sent per exec_sql call; a failed batch is retried one statement
+# at a time
+SQL_BATCH_SIZE = 50
+
+def iter_sql_statements(sql_file_path: Path) -> Iterator[str]:
+    """
+    Yield the statements of a SQL file one at a time
+    
+    The file is memory-mapped and scanned line by line as bytes. Semicolons
+    only end a statement outside of quoted strings and $$-quoted function
+    bodies, and -- comments are dropped. Each statement is decoded only when
+    it is yielded.
+    """
+    quote, semicolon = ord("'"), ord(';')
+    buffer = []
+    in_string = False
+    in_dollar_quote = False
+    
+    with open(sql_file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for line in iter(mm.readline, b''):
+                start = 0
+                i = 0
+                while i < len(line):
+                    if in_string:
+                        if line[i] == quote:
+                            in_string = False
+                    elif line.startswith(b'$$', i):
+                        in_dollar_quote = not in_dollar_quote
+                        i += 1
+                    elif in_dollar_quote:
+                        pass
+                    elif line[i] == quote:
+                        in_string = True
+                    elif line.startswith(b'--', i):
+                        # Keep the line break so tokens around the comment stay apart
+                        buffer.append(line[start:i])
+                        buffer.append(b'\n')
+                        start = len(line)
+                        break
+                    elif line[i] == semicolon:
+                        buffer.append(line[start:i])
+                        statement = b''.join(buffer).strip()
+                        if statement:
+                            yield statement.decode('utf-8')
+                        buffer = []
+                        start = i + 1
+                    i += 1
+                
+                buffer.append(line[start:])
+    
+    statement = b''.join(buffer).strip()
+    if statement:
+        yield statement.decode('utf-8')
+
+@lru_cache(maxsize=1)
+def get_supabase_client(url: str, service_key: str) -> Client:
+    """Get a Supabase client, shared by every step of the fix"""
+    return create_client(url, service_key)
+
+def execute_sql(supabase: Client, sql: str):
+    """Execute SQL through the exec_sql RPC, raising if it reports an error"""
+    result = supabase.rpc('exec_sql', {'sql': sql}).execute()
+    # exec_sql traps errors and returns SQLERRM instead of 'OK'
+    if result.data not in (None, 'OK'):
+        raise RuntimeError(result.data)
+
 def apply_database_fix():
     """Apply the database fix SQL to Supabase"""
     
@@ -25,8 +99,8 @@ def apply_database_fix():
         return False
     
     try:
-        # Create Supabase client with service role key
-        supabase: Client = create_client(url, service_key)
+        # Get Supabase client with service role key
+        supabase: Client = get_supabase_client(url, service_key)
         
         # Read the database fix SQL file
         sql_file_path = Path(__file__).parent / "database_fix_complete.sql"
@@ -35,25 +109,37 @@ def apply_database_fix():
             print(f"❌ Error: SQL file not found at {sql_file_path}")
             return False
         
-        with open(sql_file_path, 'r', encoding='utf-8') as f:
-            sql_content = f.read()
-        
         print("🔄 Applying database fix to Supabase...")
         
-        # Split SQL into individual statements and execute them
-        statements = [stmt.strip() for stmt in sql_content.split(';') if stmt.strip()]
+        # Stream the SQL file and execute it in batches of statements, one
+        # RPC round-trip per batch
+        statements = iter_sql_statements(sql_file_path)
+        executed = 0
         
-        for i, statement in enumerate(statements):
-            if statement.strip():
-                try:
-                    print(f"📝 Executing statement {i+1}/{len(statements)}...")
-                    # Use the RPC function to execute raw SQL
-                    result = supabase.rpc('exec_sql', {'sql': statement}).execute()
-                    print(f"✅ Statement {i+1} executed successfully")
-                except Exception as e:
-                    print(f"⚠️  Warning: Statement {i+1} failed: {str(e)}")
-                    # Continue with other statements
-                    continue
+        while True:
+            batch = list(islice(statements, SQL_BATCH_SIZE))
+            if not batch:
+                break
+            
+            first, last = executed + 1, executed + len(batch)
+            try:
+                print(f"📝 Executing statements {first}-{last}...")
+                execute_sql(supabase, ";\n".join(batch))
+                print(f"✅ Statements {first}-{last} executed successfully")
+            except Exception as e:
+                # The failed batch was rolled back; fall back to one statement
+                # per call so the remaining statements still apply
+                print(f"⚠️  Warning: Batch {first}-{last} failed ({str(e)}), retrying statements individually")
+                for i, statement in enumerate(batch, start=first):
+                    try:
+                        execute_sql(supabase, statement)
+                        print(f"✅ Statement {i} executed successfully")
+                    except Exception as e:
+                        print(f"⚠️  Warning: Statement {i} failed: {str(e)}")
+                        # Continue with other statements
+                        continue
+            
+            executed = last
         
         print("✅ Database fix applied successfully!")
         
@@ -81,7 +167,7 @@ def create_exec_sql_function():
         return False
     
     try:
-        supabase: Client = create_client(url, service_key)
+        supabase: Client = get_supabase_client(url, service_key)
         
         # Create the exec_sql function
         exec_sql_function = """
@@ -114,11 +200,19 @@ def main():
     print("🚀 VEO7 Database Fix Application")
     print("=" * 50)
     
-    # First, try to create the exec_sql function
-    create_exec_sql_function()
-    
-    # Apply the database fix
-    success = apply_database_fix()
+    if os.getenv("DATABASE_URL"):
+        # Prefer a direct PostgreSQL connection: the whole file goes over the
+        # wire protocol instead of being JSON-wrapped per exec_sql RPC call
+        from apply_db_fix_direct import apply_database_fix_direct
+        
+        print("🔄 DATABASE_URL is set, applying the fix over a direct connection...")
+        success = apply_database_fix_direct()
+    else:
+        # First, try to create the exec_sql function
+        create_exec_sql_function()
+        
+        # Apply the database fix
+        success = apply_database_fix()
     
     if success:
         print("\n🎉 Database fix completed successfully!")
@@ -7,6 +7,7 @@ This script connects directly to the PostgreSQL database and applies the schema
 import os
 import sys
 import psycopg2
+from psycopg2 import sql
 from pathlib import Path
 from dotenv import load_dotenv
 from urllib.parse import urlparse
@@ -36,7 +37,9 @@ def apply_database_fix_direct():
             database=parsed.path[1:],  # Remove leading slash
             user=parsed.username,
             password=parsed.password,
-            sslmode='require'
+            sslmode='require',
+            keepalives=1,
+            keepalives_idle=30
         )
         
         # Set autocommit to handle DDL statements
@@ -50,7 +53,9 @@ def apply_database_fix_direct():
             print(f"❌ Error: SQL file not found at {sql_file_path}")
             return False
         
-        with open(sql_file_path, 'r', encoding='utf-8') as f:
+        # Read the file as bytes; psycopg2 sends a bytes query as-is, so the
+        # file is never decoded into a str
+        with open(sql_file_path, 'rb') as f:
             sql_content = f.read()
         
         print("🔄 Applying database fix...")
@@ -63,21 +68,34 @@ def apply_database_fix_direct():
             print(f"❌ Error executing SQL: {e}")
             return False
         
-        # Test the fix by checking if plans table exists
+        # Test the fix by checking if plans and the other important tables
+        # exist, then count all of them in a single query
+        tables_to_check = ['plans', 'users', 'projects', 'jobs', 'comments', 'ratings', 'subscriptions']
         try:
-            cursor.execute("SELECT COUNT(*) FROM plans;")
-            count = cursor.fetchone()[0]
-            print(f"✅ Plans table is accessible with {count} records")
+            cursor.execute(
+                "SELECT relname FROM pg_class "
+                "WHERE relkind = 'r' AND relname = ANY(%s) AND pg_table_is_visible(oid);",
+                (tables_to_check,)
+            )
+            existing_tables = {row[0] for row in cursor.fetchall()}
             
-            # Check other important tables
-            tables_to_check = ['users', 'projects', 'jobs', 'comments', 'ratings', 'subscriptions']
-            for table in tables_to_check:
-                try:
-                    cursor.execute(f"SELECT COUNT(*) FROM {table};")
-                    count = cursor.fetchone()[0]
-                    print(f"✅ {table} table: {count} records")
-                except Exception as e:
-                    print(f"⚠️  {table} table: {e}")
+            if 'plans' not in existing_tables:
+                print("❌ Error: Plans table still not accessible: relation \"plans\" does not exist")
+                return False
+            
+            counted_tables = [table for table in tables_to_check if table in existing_tables]
+            cursor.execute(sql.SQL(" UNION ALL ").join(
+                sql.SQL("SELECT {}, COUNT(*) FROM {}").format(sql.Literal(table), sql.Identifier(table))
+                for table in counted_tables
+            ))
+            counts = dict(cursor.fetchall())
+            
+            print(f"✅ Plans table is accessible with {counts['plans']} records")
+            for table in tables_to_check[1:]:
+                if table in counts:
+                    print(f"✅ {table} table: {counts[table]} records")
+                else:
+                    print(f"⚠️  {table} table: relation \"{table}\" does not exist")
             
             return True
             
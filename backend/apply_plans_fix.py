@@ -1,179 +1,279 @@
 #!/usr/bin/env python3
 """
 Apply plans table fix using Supabase REST API
-This script creates the plans table using HTTP requests
+This script creates the plans table using HTTP requests, or a direct
+PostgreSQL connection when DATABASE_URL is set
 """
 
+import asyncio
 import os
-import requests
+import httpx
+import orjson
+from functools import lru_cache
 from pathlib import Path
 from dotenv import load_dotenv
 
+try:
+    import psycopg2
+    PSYCOPG2_AVAILABLE = True
+except ImportError:
+    PSYCOPG2_AVAILABLE = False
+
 # Load environment variables
 load_dotenv()
 
-def apply_plans_fix():
-    """Apply the plans table fix using Supabase REST API"""
-    
-    # Get Supabase credentials
+# Connections kept open to Supabase; every call of the fix shares them
+SUPABASE_POOL_SIZE = 10
+
+# Transient Supabase failures are retried with exponential backoff
+SUPABASE_MAX_RETRIES = 5
+SUPABASE_RETRY_BACKOFF = 0.3
+# Longest Retry-After honoured, so a misbehaving proxy cannot stall the fix
+SUPABASE_MAX_RETRY_AFTER = 30
+_RETRY_STATUSES = frozenset({429, 502, 503, 504})
+
+# Set once the fix has been applied, so later main() calls in the same
+# process skip it
+_APPLIED = False
+
+# Extensions, table and seed plans the plans SQL file relies on
+_TABLES_SQL = """
+-- Enable required extensions
+CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
+CREATE EXTENSION IF NOT EXISTS "pgcrypto";
+
+-- Create plans table
+CREATE TABLE IF NOT EXISTS plans (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    name VARCHAR(100) NOT NULL,
+    description TEXT,
+    price DECIMAL(10,2) NOT NULL DEFAULT 0.00,
+    currency VARCHAR(3) NOT NULL DEFAULT 'USD',
+    duration_days INTEGER NOT NULL DEFAULT 30,
+    features JSONB DEFAULT '[]'::jsonb,
+    max_projects INTEGER DEFAULT 10,
+    max_videos_per_month INTEGER DEFAULT 50,
+    max_storage_gb INTEGER DEFAULT 5,
+    is_active BOOLEAN DEFAULT true,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    UNIQUE(name)
+);
+
+-- Earlier runs of this script inserted the default plans repeatedly; keep one
+-- row per name (moving any subscriptions onto it) so the unique index can build
+DO $$
+BEGIN
+    IF to_regclass('subscriptions') IS NOT NULL THEN
+        UPDATE subscriptions s SET plan_id = keep.id
+        FROM plans dup, plans keep
+        WHERE s.plan_id = dup.id
+          AND keep.name = dup.name
+          AND keep.ctid = (SELECT min(p.ctid) FROM plans p WHERE p.name = dup.name)
+          AND dup.id <> keep.id;
+    END IF;
+END $$;
+DELETE FROM plans a USING plans b WHERE a.name = b.name AND a.ctid > b.ctid;
+
+-- Tables created before the constraint existed get it as an index
+CREATE UNIQUE INDEX IF NOT EXISTS plans_name_key ON plans(name);
+
+-- Insert default plans if not exists
+INSERT INTO plans (name, description, price, duration_days, features, max_projects, max_videos_per_month, max_storage_gb, is_active) VALUES
+('Free', 'خطة مجانية للمبتدئين', 0.00, 30, '["إنشاء 5 فيديوهات شهرياً", "جودة HD", "دعم أساسي"]'::jsonb, 3, 5, 1, true),
+('Basic', 'خطة أساسية للاستخدام الشخصي', 9.99, 30, '["إنشاء 25 فيديو شهرياً", "جودة Full HD", "دعم عبر البريد الإلكتروني", "إزالة العلامة المائية"]'::jsonb, 10, 25, 5, true),
+('Pro', 'خطة احترافية للمبدعين', 29.99, 30, '["إنشاء 100 فيديو شهرياً", "جودة 4K", "دعم أولوية", "تحليلات متقدمة", "تصدير بصيغ متعددة"]'::jsonb, 50, 100, 20, true)
+ON CONFLICT (name) DO NOTHING;
+"""
+
+@lru_cache(maxsize=1)
+def _creds():
+    """Read the Supabase URL, service key and request headers once"""
     url = os.getenv("SUPABASE_URL")
     service_key = os.getenv("SUPABASE_SERVICE_KEY")
     
     if not url or not service_key:
-        print("❌ Error: SUPABASE_URL and SUPABASE_SERVICE_KEY must be set in .env file")
-        return False
+        raise RuntimeError("SUPABASE_URL and SUPABASE_SERVICE_KEY must be set in .env file")
+    
+    headers = {
+        'apikey': service_key,
+        'Authorization': f'Bearer {service_key}',
+        'Content-Type': 'application/json'
+    }
+    return url, service_key, headers
+
+def _session(headers: dict) -> httpx.AsyncClient:
+    """Create the HTTP/2 client shared by every Supabase call of the fix"""
+    return httpx.AsyncClient(
+        http2=True,
+        headers=headers,
+        timeout=30,
+        limits=httpx.Limits(
+            max_connections=SUPABASE_POOL_SIZE,
+            max_keepalive_connections=SUPABASE_POOL_SIZE,
+            keepalive_expiry=60
+        )
+    )
+
+async def _send(session: httpx.AsyncClient, method: str, url: str, **kwargs):
+    """
+    Send a request, returning the status and the body (JSON when available)
+    
+    Connection errors and transient statuses are retried with exponential
+    backoff, honouring Retry-After (up to SUPABASE_MAX_RETRY_AFTER seconds)
+    when the server sends one.
+    """
+    for attempt in range(SUPABASE_MAX_RETRIES + 1):
+        delay = SUPABASE_RETRY_BACKOFF * 2 ** attempt
+        try:
+            response = await session.request(method, url, **kwargs)
+            if response.status_code == 200:
+                return response.status_code, orjson.loads(response.content)
+            if response.status_code not in _RETRY_STATUSES or attempt == SUPABASE_MAX_RETRIES:
+                return response.status_code, response.text
+            
+            retry_after = response.headers.get('Retry-After', '')
+            if retry_after.isdigit():
+                delay = min(int(retry_after), SUPABASE_MAX_RETRY_AFTER)
+        except httpx.TransportError:
+            if attempt == SUPABASE_MAX_RETRIES:
+                raise
+        
+        await asyncio.sleep(delay)
+
+async def _get(session: httpx.AsyncClient, url: str):
+    """GET a URL, returning the status and the body (JSON when available)"""
+    return await _send(session, 'GET', url, timeout=10)
+
+async def _post_sql(session: httpx.AsyncClient, url: str, sql: str):
+    """Run SQL through the exec_sql RPC, returning the status and the body"""
+    # Every statement the fix sends is idempotent, so retrying is safe
+    return await _send(session, 'POST', f"{url}/rest/v1/rpc/exec_sql", content=orjson.dumps({'sql': sql}))
+
+def load_plans_sql():
+    """Return the minimal tables SQL followed by the plans SQL file, or None if the file is missing"""
+    
+    # Read the plans SQL file
+    sql_file_path = Path(__file__).parent / "create_plans_table.sql"
+    
+    try:
+        sql_content = sql_file_path.read_text(encoding='utf-8')
+    except FileNotFoundError:
+        print(f"❌ Error: SQL file not found at {sql_file_path}")
+        return None
+    
+    return _TABLES_SQL + "\n" + sql_content
+
+def apply_plans_fix_direct(database_url: str, plans_sql: str):
+    """Apply the plans table fix over a direct PostgreSQL connection"""
     
     try:
-        # Read the plans SQL file
-        sql_file_path = Path(__file__).parent / "create_plans_table.sql"
+        print("🔄 Applying plans table fix over a direct PostgreSQL connection...")
+        conn = psycopg2.connect(database_url, sslmode='require')
+        # No client-side BEGIN/COMMIT: the batch below is its own transaction
+        conn.autocommit = True
         
-        if not sql_file_path.exists():
-            print(f"❌ Error: SQL file not found at {sql_file_path}")
-            return False
+        try:
+            # Send the schema, the seed data and the check as one query.
+            # PostgreSQL runs a multi-statement query as a single implicit
+            # transaction, so a failing statement rolls back the whole batch
+            # and skips the rest, including the final SELECT, in one round trip
+            with conn.cursor() as cursor:
+                cursor.execute(plans_sql + ";\nSELECT name, price FROM plans;")
+                plans = cursor.fetchall()
+        finally:
+            conn.close()
         
-        with open(sql_file_path, 'r', encoding='utf-8') as f:
-            sql_content = f.read()
+        print("✅ Plans table created successfully!")
+        print(f"✅ Found {len(plans)} plans in the database")
+        for name, price in plans:
+            print(f"  - {name}: ${price}")
         
-        print("🔄 Applying plans table fix to Supabase...")
+        return True
         
-        # Use Supabase REST API to execute SQL
-        headers = {
-            'apikey': service_key,
-            'Authorization': f'Bearer {service_key}',
-            'Content-Type': 'application/json'
-        }
+    except Exception as e:
+        print(f"❌ Error applying plans fix: {e}")
+        return False
+
+async def apply_plans_fix(session: httpx.AsyncClient, url: str, plans_sql: str):
+    """Apply the plans table fix using Supabase REST API"""
+    
+    try:
+        print("🔄 Applying plans table fix to Supabase...")
         
-        # Execute SQL using the rpc endpoint
-        rpc_url = f"{url}/rest/v1/rpc/exec_sql"
+        # Execute the minimal tables and the plans SQL as one batch through
+        # the rpc endpoint: a single round trip, applied or rolled back as a
+        # whole
+        status, result = await _post_sql(session, url, plans_sql)
         
-        # Try to execute the SQL
-        response = requests.post(
-            rpc_url,
-            headers=headers,
-            json={'sql': sql_content},
-            timeout=30
-        )
+        # exec_sql traps errors and returns SQLERRM instead of 'OK'
+        if result != 'OK':
+            print(f"❌ Error: SQL execution failed: {status} - {result}")
+            return False
         
-        if response.status_code == 200:
-            print("✅ Plans table created successfully!")
-        else:
-            print(f"⚠️  SQL execution response: {response.status_code} - {response.text}")
-            # Continue to test if table exists
+        print("✅ Plans table created successfully!")
         
-        # Test if plans table is accessible
-        plans_url = f"{url}/rest/v1/plans?select=count"
-        test_response = requests.get(plans_url, headers=headers, timeout=10)
+        # Fetching the plans data also proves the table is accessible; only
+        # the columns printed below are transferred
+        plans_data_url = f"{url}/rest/v1/plans?select=name,price"
+        data_status, plans = await _get(session, plans_data_url)
         
-        if test_response.status_code == 200:
+        if data_status == 200:
             print("✅ Plans table is accessible")
-            
-            # Get actual plans data
-            plans_data_url = f"{url}/rest/v1/plans?select=*"
-            data_response = requests.get(plans_data_url, headers=headers, timeout=10)
-            
-            if data_response.status_code == 200:
-                plans = data_response.json()
-                print(f"✅ Found {len(plans)} plans in the database")
-                for plan in plans:
-                    print(f"  - {plan.get('name', 'Unknown')}: ${plan.get('price', 0)}")
+            print(f"✅ Found {len(plans)} plans in the database")
+            for plan in plans:
+                print(f"  - {plan.get('name', 'Unknown')}: ${plan.get('price', 0)}")
             
             return True
         else:
-            print(f"❌ Error: Plans table still not accessible: {test_response.status_code} - {test_response.text}")
+            print(f"❌ Error: Plans table still not accessible: {data_status} - {plans}")
             return False
             
     except Exception as e:
         print(f"❌ Error applying plans fix: {e}")
         return False
 
-def create_minimal_tables():
-    """Create minimal required tables"""
-    
-    url = os.getenv("SUPABASE_URL")
-    service_key = os.getenv("SUPABASE_SERVICE_KEY")
-    
-    if not url or not service_key:
-        print("❌ Error: SUPABASE_URL and SUPABASE_SERVICE_KEY must be set")
-        return False
-    
-    headers = {
-        'apikey': service_key,
-        'Authorization': f'Bearer {service_key}',
-        'Content-Type': 'application/json'
-    }
-    
-    # Create tables using direct SQL execution via HTTP
-    tables_sql = """
-    -- Enable required extensions
-    CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
-    CREATE EXTENSION IF NOT EXISTS "pgcrypto";
-    
-    -- Create plans table
-    CREATE TABLE IF NOT EXISTS plans (
-        id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
-        name VARCHAR(100) NOT NULL,
-        description TEXT,
-        price DECIMAL(10,2) NOT NULL DEFAULT 0.00,
-        currency VARCHAR(3) NOT NULL DEFAULT 'USD',
-        duration_days INTEGER NOT NULL DEFAULT 30,
-        features JSONB DEFAULT '[]'::jsonb,
-        max_projects INTEGER DEFAULT 10,
-        max_videos_per_month INTEGER DEFAULT 50,
-        max_storage_gb INTEGER DEFAULT 5,
-        is_active BOOLEAN DEFAULT true,
-        created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-        updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
-    );
-    
-    -- Insert default plans if not exists
-    INSERT INTO plans (name, description, price, duration_days, features, max_projects, max_videos_per_month, max_storage_gb, is_active) 
-    SELECT 'Free', 'خطة مجانية للمبتدئين', 0.00, 30, '["إنشاء 5 فيديوهات شهرياً", "جودة HD", "دعم أساسي"]'::jsonb, 3, 5, 1, true
-    WHERE NOT EXISTS (SELECT 1 FROM plans WHERE name = 'Free');
-    
-    INSERT INTO plans (name, description, price, duration_days, features, max_projects, max_videos_per_month, max_storage_gb, is_active) 
-    SELECT 'Basic', 'خطة أساسية للاستخدام الشخصي', 9.99, 30, '["إنشاء 25 فيديو شهرياً", "جودة Full HD", "دعم عبر البريد الإلكتروني", "إزالة العلامة المائية"]'::jsonb, 10, 25, 5, true
-    WHERE NOT EXISTS (SELECT 1 FROM plans WHERE name = 'Basic');
-    
-    INSERT INTO plans (name, description, price, duration_days, features, max_projects, max_videos_per_month, max_storage_gb, is_active) 
-    SELECT 'Pro', 'خطة احترافية للمبدعين', 29.99, 30, '["إنشاء 100 فيديو شهرياً", "جودة 4K", "دعم أولوية", "تحليلات متقدمة", "تصدير بصيغ متعددة"]'::jsonb, 50, 100, 20, true
-    WHERE NOT EXISTS (SELECT 1 FROM plans WHERE name = 'Pro');
-    """
+async def _amain(plans_sql: str):
+    """Apply the plans fix with the Supabase credentials from the environment"""
     
+    # Get Supabase credentials
     try:
-        print("🔄 Creating minimal required tables...")
-        
-        # Try using the SQL editor endpoint
-        sql_url = f"{url}/rest/v1/rpc/exec_sql"
-        
-        response = requests.post(
-            sql_url,
-            headers=headers,
-            json={'sql': tables_sql},
-            timeout=30
-        )
-        
-        print(f"📝 SQL execution response: {response.status_code}")
-        if response.text:
-            print(f"📄 Response: {response.text}")
-        
-        return True
-        
-    except Exception as e:
-        print(f"❌ Error creating tables: {e}")
+        url, _, headers = _creds()
+    except RuntimeError as e:
+        print(f"❌ Error: {e}")
         return False
+    
+    # The batch and the verification share one HTTP/2 connection, so only the
+    # first request pays the TLS handshake and repeated headers are
+    # HPACK-compressed
+    async with _session(headers) as session:
+        return await apply_plans_fix(session, url, plans_sql)
 
 def main():
     """Main function"""
+    global _APPLIED
+    
     print("🚀 VEO7 Plans Table Fix")
     print("=" * 40)
     
-    # Try to create minimal tables first
-    create_minimal_tables()
+    if _APPLIED:
+        print("✅ Plans table fix already applied in this process")
+        return True
     
-    # Apply the plans fix
-    success = apply_plans_fix()
+    plans_sql = load_plans_sql()
+    database_url = os.getenv("DATABASE_URL")
+    
+    if plans_sql is None:
+        success = False
+    elif database_url and PSYCOPG2_AVAILABLE:
+        # Prefer a direct PostgreSQL connection: the SQL runs in one
+        # transaction without the HTTP and PostgREST round trips
+        success = apply_plans_fix_direct(database_url, plans_sql)
+    else:
+        success = asyncio.run(_amain(plans_sql))
     
     if success:
+        _APPLIED = True
         print("\n🎉 Plans table fix completed successfully!")
         print("You can now test the /api/plans endpoint.")
     else:
@@ -12,15 +12,35 @@ CREATE TABLE IF NOT EXISTS plans (
     max_storage_gb INTEGER DEFAULT 5,
     is_active BOOLEAN DEFAULT true,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    UNIQUE(name)
 );
 
+-- Earlier runs of this script inserted the default plans repeatedly; keep one
+-- row per name (moving any subscriptions onto it) so the unique index can build
+DO $$
+BEGIN
+    IF to_regclass('subscriptions') IS NOT NULL THEN
+        UPDATE subscriptions s SET plan_id = keep.id
+        FROM plans dup, plans keep
+        WHERE s.plan_id = dup.id
+          AND keep.name = dup.name
+          AND keep.ctid = (SELECT min(p.ctid) FROM plans p WHERE p.name = dup.name)
+          AND dup.id <> keep.id;
+    END IF;
+END $$;
+DELETE FROM plans a USING plans b WHERE a.name = b.name AND a.ctid > b.ctid;
+
+-- Tables created before the constraint existed get it as an index
+CREATE UNIQUE INDEX IF NOT EXISTS plans_name_key ON plans(name);
+
 -- Insert default plans
 INSERT INTO plans (name, description, price, duration_days, features, max_projects, max_videos_per_month, max_storage_gb, is_active) VALUES
 ('Free', 'خطة مجانية للمبتدئين', 0.00, 30, '["إنشاء 5 فيديوهات شهرياً", "جودة HD", "دعم أساسي"]'::jsonb, 3, 5, 1, true),
 ('Basic', 'خطة أساسية للاستخدام الشخصي', 9.99, 30, '["إنشاء 25 فيديو شهرياً", "جودة Full HD", "دعم عبر البريد الإلكتروني", "إزالة العلامة المائية"]'::jsonb, 10, 25, 5, true),
 ('Pro', 'خطة احترافية للمبدعين', 29.99, 30, '["إنشاء 100 فيديو شهرياً", "جودة 4K", "دعم أولوية", "تحليلات متقدمة", "تصدير بصيغ متعددة"]'::jsonb, 50, 100, 20, true),
-('Enterprise', 'خطة للشركات والمؤسسات', 99.99, 30, '["فيديوهات غير محدودة", "جودة 4K+", "دعم مخصص 24/7", "API مخصص", "تكامل مع الأنظمة", "تدريب فريق العمل"]'::jsonb, -1, -1, 100, true);
+('Enterprise', 'خطة للشركات والمؤسسات', 99.99, 30, '["فيديوهات غير محدودة", "جودة 4K+", "دعم مخصص 24/7", "API مخصص", "تكامل مع الأنظمة", "تدريب فريق العمل"]'::jsonb, -1, -1, 100, true)
+ON CONFLICT (name) DO NOTHING;
 
 -- Create index for better performance
 CREATE INDEX IF NOT EXISTS idx_plans_active ON plans(is_active);
@@ -2,14 +2,25 @@
 Services package for VEO7 Video Platform
 """
 
-from .supabase_service import SupabaseService
-from .video_generation_service import VideoGenerationService
-from .paypal_service import PayPalService
-from .file_service import FileService
+from importlib import import_module
+
+# Service classes are imported on first access, so light modules such as
+# services.scheduling can be used without the media and payment dependencies
+_SERVICE_MODULES = {
+    "SupabaseService": ".supabase_service",
+    "VideoGenerationService": ".video_generation_service",
+    "PayPalService": ".paypal_service",
+    "FileService": ".file_service",
+}
 
 __all__ = [
     "SupabaseService",
-    "VideoGenerationService", 
+    "VideoGenerationService",
     "PayPalService",
     "FileService"
-]
\ No newline at end of file
+]
+
+def __getattr__(name):
+    if name in _SERVICE_MODULES:
+        return getattr(import_module(_SERVICE_MODULES[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -8,15 +8,21 @@ import os
 import json
 import time
 import uuid
-from typing import List, Dict, Optional, Callable, Any
+from typing import List, Dict, Optional, Callable, Any, Tuple, Union, Sequence, Protocol
 from datetime import datetime, timedelta
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from dataclasses import dataclass, asdict
-from enum import Enum
+from dataclasses import dataclass, asdict, field
 import threading
 from queue import Queue, PriorityQueue
 import logging
 
+import orjson
+from sortedcontainers import SortedKeyList
+
+from .scheduling import (
+    JobStatus, JobPriority, VideoJobInput, AudioJobInput, TranslationJobInput,
+    JobInput, JOB_INPUT_TYPES, BatchJob, WorkStealingScheduler
+)
 from .video_service import VideoService
 from .audio_service import AudioService
 from .translation_service import EnhancedTranslationService
@@ -25,39 +31,38 @@ from .translation_service import EnhancedTranslationService
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-class JobStatus(Enum):
-    PENDING = "pending"
-    PROCESSING = "processing"
-    COMPLETED = "completed"
-    FAILED = "failed"
-    CANCELLED = "cancelled"
+class VideoJobSpec(Protocol):
+    """Anything exposing video job fields as attributes (e.g. a validated request model)"""
+    image_path: str
+    audio_path: Optional[str]
+    output_path: str
+    duration: float
+    quality: str
+    effects: List[str]
 
-class JobPriority(Enum):
-    LOW = 3
-    MEDIUM = 2
-    HIGH = 1
-    URGENT = 0
+class AudioJobSpec(Protocol):
+    """Anything exposing audio job fields as attributes"""
+    text: str
+    output_path: str
+    voice: str
+    quality: str
+    language: str
 
-@dataclass
-class BatchJob:
-    """Represents a single job in the batch processing queue"""
-    id: str
-    job_type: str  # 'video', 'audio', 'translation'
-    input_data: Dict[str, Any]
-    priority: JobPriority
-    status: JobStatus
-    created_at: datetime
-    started_at: Optional[datetime] = None
-    completed_at: Optional[datetime] = None
-    progress: float = 0.0
-    result: Optional[Dict[str, Any]] = None
-    error: Optional[str] = None
-    retry_count: int = 0
-    max_retries: int = 3
+class TranslationJobSpec(Protocol):
+    """Anything exposing translation job fields as attributes"""
+    text: str
+    source_lang: Optional[str]
+    target_lang: str
+    quality: str
 
-    def __lt__(self, other):
-        """For priority queue ordering"""
-        return self.priority.value < other.priority.value
+JobSpec = Union[VideoJobSpec, AudioJobSpec, TranslationJobSpec]
+
+def _to_job_input(job_type: str, spec: JobSpec) -> JobInput:
+    """Copy a job spec's attributes into the matching plain job input"""
+    input_type = JOB_INPUT_TYPES[job_type]
+    if isinstance(spec, input_type):
+        return spec
+    return input_type(*[getattr(spec, name) for name in input_type.__match_args__])
 
 @dataclass
 class BatchRequest:
@@ -72,12 +77,30 @@ class BatchRequest:
     status: JobStatus = JobStatus.PENDING
     estimated_duration: Optional[float] = None
     actual_duration: Optional[float] = None
+    version: int = 0  # Bumped whenever the batch or one of its jobs changes state
+    created_at_iso: str = field(default="", repr=False)
+
+    def __post_init__(self):
+        """Normalize created_at and cache its ISO form for listings"""
+        if isinstance(self.created_at, str):
+            self.created_at = datetime.fromisoformat(self.created_at)
+        self.created_at_iso = self.created_at.isoformat()
+
+# Batch statuses that are never left once reached
+_FINAL_STATUSES = (JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED)
+
+def _batch_sort_key(batch_request: BatchRequest) -> Tuple[float, str]:
+    """Sort key for batch indexes (newest first, ties broken by id)"""
+    return (-batch_request.created_at.timestamp(), batch_request.id)
 
 class BatchProcessingService:
-    def __init__(self, max_workers: int = 4, cache_dir: str = "cache/batch"):
+    def __init__(self, max_workers: int = 4, cache_dir: str = "cache/batch",
+                 cleanup_interval: float = 3600.0, cleanup_days: int = 7):
         """Initialize batch processing service"""
         self.max_workers = max_workers
         self.cache_dir = cache_dir
+        self.cleanup_interval = cleanup_interval
+        self.cleanup_days = cleanup_days
         os.makedirs(self.cache_dir, exist_ok=True)
         
         # Initialize services
@@ -86,15 +109,36 @@ class BatchProcessingService:
         self.translation_service = EnhancedTranslationService()
         
         # Queue management
-        self.job_queue = PriorityQueue()
+        self.job_queue = WorkStealingScheduler(max_workers)
         self.active_jobs: Dict[str, BatchJob] = {}
         self.completed_jobs: Dict[str, BatchJob] = {}
         self.batch_requests: Dict[str, BatchRequest] = {}
         
+        # Batch indexes ordered by creation time (newest first)
+        self._index_lock = threading.Lock()
+        self._batches_by_ctime = SortedKeyList(key=_batch_sort_key)
+        self._batches_by_status: Dict[JobStatus, SortedKeyList] = {
+            status: SortedKeyList(key=_batch_sort_key) for status in JobStatus
+        }
+        
+        # Serialized status responses keyed by batch ID: (batch version, JSON bytes)
+        self._status_cache: Dict[str, Tuple[int, bytes]] = {}
+        # Last service stats snapshot: (monotonic time, stats dict)
+        self._stats_snapshot: Tuple[float, Dict[str, Any]] = (0.0, {})
+        
         # Worker management
         self.executor = ThreadPoolExecutor(max_workers=max_workers)
         self.is_running = False
-        self.worker_thread = None
+        self.worker_threads: List[threading.Thread] = []
+        self._save_lock = threading.Lock()
+        # Guards stats, active_jobs, completed_jobs and batch counters/versions,
+        # which every worker thread updates
+        self._state_lock = threading.RLock()
+        
+        # Background cleanup (runs every cleanup_interval or when requested)
+        self.cleanup_thread = None
+        self._cleanup_event = threading.Event()
+        self._cleanup_requested_days: Optional[int] = None
         
         # Statistics
         self.stats = {
@@ -129,6 +173,7 @@ class BatchProcessingService:
                     jobs = []
                     for job_data in batch_data.get('jobs', []):
                         job = BatchJob(**job_data)
+                        job.input_data = JOB_INPUT_TYPES[job.job_type](**job_data['input_data'])
                         job.created_at = datetime.fromisoformat(job_data['created_at'])
                         if job_data.get('started_at'):
                             job.started_at = datetime.fromisoformat(job_data['started_at'])
@@ -141,53 +186,140 @@ class BatchProcessingService:
                     batch_request.jobs = jobs
                     batch_request.status = JobStatus(batch_data['status'])
                     self.batch_requests[batch_id] = batch_request
+                    self._index_batch(batch_request)
                     
                 logger.info(f"Loaded {len(self.batch_requests)} batch requests from disk")
                 
         except Exception as e:
             logger.error(f"Failed to load persistent data: {e}")
     
+    def _index_batch(self, batch_request: BatchRequest):
+        """Add a batch to the creation-time and status indexes"""
+        with self._index_lock:
+            self._batches_by_ctime.add(batch_request)
+            self._batches_by_status[batch_request.status].add(batch_request)
+    
+    def _unindex_batch(self, batch_request: BatchRequest):
+        """Remove a batch from the creation-time and status indexes"""
+        with self._index_lock:
+            self._batches_by_ctime.discard(batch_request)
+            self._batches_by_status[batch_request.status].discard(batch_request)
+    
+    def _set_batch_status(self, batch_request: BatchRequest, status: JobStatus):
+        """Change a batch status and move it to the matching status index"""
+        if batch_request.status == status:
+            return
+        with self._index_lock:
+            self._batches_by_status[batch_request.status].discard(batch_request)
+            batch_request.status = status
+            self._batches_by_status[status].add(batch_request)
+    
+    def list_batch_requests(self, status: Optional[JobStatus] = None,
+                            offset: int = 0, limit: int = 50) -> Tuple[List[BatchRequest], int]:
+        """
+        Get a page of batches, newest first
+        
+        Args:
+            status: Optional status to filter by
+            offset: Number of batches to skip
+            limit: Maximum number of batches to return
+            
+        Returns:
+            Tuple of (batches in the page, total matching batches)
+        """
+        with self._index_lock:
+            index = self._batches_by_ctime if status is None else self._batches_by_status[status]
+            return list(index.islice(offset, offset + limit)), len(index)
+    
     def _save_persistent_data(self):
         """Save persistent batch data to disk"""
         try:
-            batch_file = os.path.join(self.cache_dir, "batch_requests.json")
-            
-            # Prepare data for serialization
-            data = {
-                'batch_requests': {},
-                'stats': self.stats
-            }
-            
-            for batch_id, batch_request in self.batch_requests.items():
-                batch_data = asdict(batch_request)
+            # Worker threads and request handlers may save concurrently
+            with self._save_lock:
+                batch_file = os.path.join(self.cache_dir, "batch_requests.json")
                 
-                # Convert datetime objects to strings
-                batch_data['created_at'] = batch_request.created_at.isoformat()
-                batch_data['status'] = batch_request.status.value
+                # Prepare data for serialization
+                with self._state_lock:
+                    stats = dict(self.stats)
+                data = {
+                    'batch_requests': {},
+                    'stats': stats
+                }
                 
-                # Convert jobs
-                jobs_data = []
-                for job in batch_request.jobs:
-                    job_data = asdict(job)
-                    job_data['created_at'] = job.created_at.isoformat()
-                    if job.started_at:
-                        job_data['started_at'] = job.started_at.isoformat()
-                    if job.completed_at:
-                        job_data['completed_at'] = job.completed_at.isoformat()
-                    job_data['priority'] = job.priority.value
-                    job_data['status'] = job.status.value
-                    jobs_data.append(job_data)
+                for batch_id, batch_request in self.batch_requests.items():
+                    batch_data = asdict(batch_request)
                 
-                batch_data['jobs'] = jobs_data
-                data['batch_requests'][batch_id] = batch_data
-            
-            with open(batch_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+                    # Convert datetime objects to strings
+                    batch_data['created_at'] = batch_request.created_at_iso
+                    batch_data['status'] = batch_request.status.value
+                
+                    # Convert jobs
+                    jobs_data = []
+                    for job in batch_request.jobs:
+                        job_data = asdict(job)
+                        job_data['created_at'] = job.created_at_iso
+                        if job.started_at:
+                            job_data['started_at'] = job.started_at.isoformat()
+                        if job.completed_at:
+                            job_data['completed_at'] = job.completed_at.isoformat()
+                        job_data['priority'] = job.priority.value
+                        job_data['status'] = job.status.value
+                        jobs_data.append(job_data)
+                
+                    batch_data['jobs'] = jobs_data
+                    data['batch_requests'][batch_id] = batch_data
+                
+                with open(batch_file, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False, indent=2)
                 
         except Exception as e:
             logger.error(f"Failed to save persistent data: {e}")
     
-    async def create_video_batch(self, video_requests: List[Dict], 
+    def _register_batch(self, job_type: str, requests: Sequence[JobSpec],
+                        batch_name: Optional[str] = None,
+                        priority: JobPriority = JobPriority.MEDIUM) -> str:
+        """Create a batch's jobs, queue them and index the batch (without saving)"""
+        batch_id = str(uuid.uuid4())
+        batch_name = batch_name or f"{job_type.capitalize()} Batch {datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        
+        # Create jobs
+        jobs = []
+        for i, request in enumerate(requests):
+            job_id = f"{batch_id}_{job_type}_{i}"
+            job = BatchJob(
+                id=job_id,
+                job_type=job_type,
+                input_data=_to_job_input(job_type, request),
+                priority=priority,
+                status=JobStatus.PENDING,
+                created_at=datetime.now()
+            )
+            jobs.append(job)
+            
+            # Add to queue
+            self.job_queue.put(job)
+        
+        # Create batch request
+        batch_request = BatchRequest(
+            id=batch_id,
+            name=batch_name,
+            jobs=jobs,
+            created_at=datetime.now(),
+            total_jobs=len(jobs),
+            estimated_duration=self._estimate_batch_duration(jobs)
+        )
+        
+        # Savers iterate batch_requests under the save lock
+        with self._save_lock:
+            self.batch_requests[batch_id] = batch_request
+        self._index_batch(batch_request)
+        with self._state_lock:
+            self.stats['queue_size'] = self.job_queue.qsize()
+        
+        logger.info(f"Created {job_type} batch {batch_id} with {len(jobs)} jobs")
+        return batch_id
+    
+    async def create_video_batch(self, video_requests: Sequence[VideoJobSpec], 
                                 batch_name: str = None, 
                                 priority: JobPriority = JobPriority.MEDIUM) -> str:
         """
@@ -202,133 +334,61 @@ class BatchProcessingService:
             Batch ID
         """
         try:
-            batch_id = str(uuid.uuid4())
-            batch_name = batch_name or f"Video Batch {datetime.now().strftime('%Y%m%d_%H%M%S')}"
-            
-            # Create jobs
-            jobs = []
-            for i, request in enumerate(video_requests):
-                job_id = f"{batch_id}_video_{i}"
-                job = BatchJob(
-                    id=job_id,
-                    job_type="video",
-                    input_data=request,
-                    priority=priority,
-                    status=JobStatus.PENDING,
-                    created_at=datetime.now()
-                )
-                jobs.append(job)
-                
-                # Add to queue
-                self.job_queue.put(job)
-            
-            # Create batch request
-            batch_request = BatchRequest(
-                id=batch_id,
-                name=batch_name,
-                jobs=jobs,
-                created_at=datetime.now(),
-                total_jobs=len(jobs),
-                estimated_duration=self._estimate_batch_duration(jobs)
-            )
-            
-            self.batch_requests[batch_id] = batch_request
-            self.stats['queue_size'] = self.job_queue.qsize()
+            batch_id = self._register_batch("video", video_requests, batch_name, priority)
             
             # Save to disk
             self._save_persistent_data()
-            
-            logger.info(f"Created video batch {batch_id} with {len(jobs)} jobs")
             return batch_id
             
         except Exception as e:
             logger.error(f"Failed to create video batch: {e}")
             raise Exception(f"Batch creation failed: {str(e)}")
     
-    async def create_audio_batch(self, audio_requests: List[Dict], 
+    async def create_audio_batch(self, audio_requests: Sequence[AudioJobSpec], 
                                 batch_name: str = None, 
                                 priority: JobPriority = JobPriority.MEDIUM) -> str:
         """Create a batch of audio generation jobs"""
         try:
-            batch_id = str(uuid.uuid4())
-            batch_name = batch_name or f"Audio Batch {datetime.now().strftime('%Y%m%d_%H%M%S')}"
-            
-            jobs = []
-            for i, request in enumerate(audio_requests):
-                job_id = f"{batch_id}_audio_{i}"
-                job = BatchJob(
-                    id=job_id,
-                    job_type="audio",
-                    input_data=request,
-                    priority=priority,
-                    status=JobStatus.PENDING,
-                    created_at=datetime.now()
-                )
-                jobs.append(job)
-                self.job_queue.put(job)
-            
-            batch_request = BatchRequest(
-                id=batch_id,
-                name=batch_name,
-                jobs=jobs,
-                created_at=datetime.now(),
-                total_jobs=len(jobs),
-                estimated_duration=self._estimate_batch_duration(jobs)
-            )
-            
-            self.batch_requests[batch_id] = batch_request
-            self.stats['queue_size'] = self.job_queue.qsize()
+            batch_id = self._register_batch("audio", audio_requests, batch_name, priority)
             self._save_persistent_data()
-            
-            logger.info(f"Created audio batch {batch_id} with {len(jobs)} jobs")
             return batch_id
             
         except Exception as e:
             logger.error(f"Failed to create audio batch: {e}")
             raise Exception(f"Audio batch creation failed: {str(e)}")
     
-    async def create_translation_batch(self, translation_requests: List[Dict], 
+    async def create_translation_batch(self, translation_requests: Sequence[TranslationJobSpec], 
                                       batch_name: str = None, 
                                       priority: JobPriority = JobPriority.MEDIUM) -> str:
         """Create a batch of translation jobs"""
         try:
-            batch_id = str(uuid.uuid4())
-            batch_name = batch_name or f"Translation Batch {datetime.now().strftime('%Y%m%d_%H%M%S')}"
-            
-            jobs = []
-            for i, request in enumerate(translation_requests):
-                job_id = f"{batch_id}_translation_{i}"
-                job = BatchJob(
-                    id=job_id,
-                    job_type="translation",
-                    input_data=request,
-                    priority=priority,
-                    status=JobStatus.PENDING,
-                    created_at=datetime.now()
-                )
-                jobs.append(job)
-                self.job_queue.put(job)
-            
-            batch_request = BatchRequest(
-                id=batch_id,
-                name=batch_name,
-                jobs=jobs,
-                created_at=datetime.now(),
-                total_jobs=len(jobs),
-                estimated_duration=self._estimate_batch_duration(jobs)
-            )
-            
-            self.batch_requests[batch_id] = batch_request
-            self.stats['queue_size'] = self.job_queue.qsize()
+            batch_id = self._register_batch("translation", translation_requests, batch_name, priority)
             self._save_persistent_data()
-            
-            logger.info(f"Created translation batch {batch_id} with {len(jobs)} jobs")
             return batch_id
             
         except Exception as e:
             logger.error(f"Failed to create translation batch: {e}")
             raise Exception(f"Translation batch creation failed: {str(e)}")
     
+    async def create_batches(self, batch_specs: List[Tuple[str, Sequence[JobSpec], Optional[str], JobPriority]]) -> List[str]:
+        """
+        Create several batches with a single save to disk
+        
+        Args:
+            batch_specs: List of (job_type, requests, batch_name, priority) tuples
+            
+        Returns:
+            Batch IDs in the same order as batch_specs
+        """
+        try:
+            batch_ids = [self._register_batch(*spec) for spec in batch_specs]
+            self._save_persistent_data()
+            return batch_ids
+            
+        except Exception as e:
+            logger.error(f"Failed to create batches: {e}")
+            raise Exception(f"Batch creation failed: {str(e)}")
+    
     def _estimate_batch_duration(self, jobs: List[BatchJob]) -> float:
         """Estimate total duration for batch processing"""
         try:
@@ -345,17 +405,17 @@ class BatchProcessingService:
                 
                 # Adjust based on input complexity
                 if job.job_type == 'video':
-                    duration = job.input_data.get('duration', 5.0)
-                    quality = job.input_data.get('quality', 'medium')
+                    duration = job.input_data.duration
+                    quality = job.input_data.quality
                     quality_multiplier = {'fast': 0.7, 'medium': 1.0, 'high': 1.5}.get(quality, 1.0)
                     total_estimate += base_estimate * (duration / 5.0) * quality_multiplier
                 
                 elif job.job_type == 'audio':
-                    text_length = len(job.input_data.get('text', ''))
+                    text_length = len(job.input_data.text)
                     total_estimate += base_estimate * (text_length / 100.0)
                 
                 elif job.job_type == 'translation':
-                    text_length = len(job.input_data.get('text', ''))
+                    text_length = len(job.input_data.text)
                     total_estimate += base_estimate * (text_length / 200.0)
             
             # Account for parallel processing
@@ -367,28 +427,36 @@ class BatchProcessingService:
             return len(jobs) * 10.0  # Fallback estimate
     
     def start_processing(self):
-        """Start the batch processing worker thread"""
+        """Start the batch processing worker threads"""
         if not self.is_running:
             self.is_running = True
-            self.worker_thread = threading.Thread(target=self._process_queue, daemon=True)
-            self.worker_thread.start()
+            self.worker_threads = [
+                threading.Thread(target=self._process_queue, args=(worker_id,), daemon=True)
+                for worker_id in range(self.max_workers)
+            ]
+            for worker_thread in self.worker_threads:
+                worker_thread.start()
+            self.cleanup_thread = threading.Thread(target=self._cleanup_loop, daemon=True)
+            self.cleanup_thread.start()
             logger.info("Batch processing started")
     
     def stop_processing(self):
-        """Stop the batch processing worker thread"""
+        """Stop the batch processing worker threads"""
         self.is_running = False
-        if self.worker_thread:
-            self.worker_thread.join(timeout=5.0)
+        self._cleanup_event.set()
+        for worker_thread in self.worker_threads:
+            worker_thread.join(timeout=5.0)
+        if self.cleanup_thread:
+            self.cleanup_thread.join(timeout=5.0)
         logger.info("Batch processing stopped")
     
-    def _process_queue(self):
+    def _process_queue(self, worker_id: int):
         """Main worker thread function"""
         while self.is_running:
             try:
                 # Get job from queue (with timeout to allow checking is_running)
-                try:
-                    job = self.job_queue.get(timeout=1.0)
-                except:
+                job = self.job_queue.get(worker_id, timeout=1.0)
+                if job is None:
                     continue
                 
                 if job.status == JobStatus.CANCELLED:
@@ -396,7 +464,6 @@ class BatchProcessingService:
                 
                 # Process the job
                 self._process_job(job)
-                self.job_queue.task_done()
                 
             except Exception as e:
                 logger.error(f"Queue processing error: {e}")
@@ -405,9 +472,11 @@ class BatchProcessingService:
     def _process_job(self, job: BatchJob):
         """Process a single job"""
         try:
-            job.status = JobStatus.PROCESSING
-            job.started_at = datetime.now()
-            self.active_jobs[job.id] = job
+            with self._state_lock:
+                job.status = JobStatus.PROCESSING
+                job.started_at = datetime.now()
+                self.active_jobs[job.id] = job
+                self._touch_batch(job.id.split('_')[0])
             
             logger.info(f"Processing job {job.id} ({job.job_type})")
             
@@ -421,53 +490,58 @@ class BatchProcessingService:
             else:
                 raise Exception(f"Unknown job type: {job.job_type}")
             
-            # Mark as completed
-            job.status = JobStatus.COMPLETED
-            job.completed_at = datetime.now()
-            job.result = result
-            job.progress = 100.0
-            
-            # Update statistics
-            self.stats['total_jobs_processed'] += 1
-            processing_time = (job.completed_at - job.started_at).total_seconds()
-            self._update_average_processing_time(processing_time)
+            # Mark as completed and update statistics
+            with self._state_lock:
+                job.status = JobStatus.COMPLETED
+                job.completed_at = datetime.now()
+                job.result = result
+                job.progress = 100.0
+                
+                self.stats['total_jobs_processed'] += 1
+                processing_time = (job.completed_at - job.started_at).total_seconds()
+                self._update_average_processing_time(processing_time)
             
             logger.info(f"Job {job.id} completed successfully")
             
         except Exception as e:
             logger.error(f"Job {job.id} failed: {e}")
-            job.status = JobStatus.FAILED
-            job.error = str(e)
-            job.completed_at = datetime.now()
-            
-            # Retry logic
-            if job.retry_count < job.max_retries:
-                job.retry_count += 1
-                job.status = JobStatus.PENDING
-                job.started_at = None
-                job.completed_at = None
-                job.error = None
-                
-                # Re-queue with lower priority
-                job.priority = JobPriority(min(job.priority.value + 1, JobPriority.LOW.value))
+            with self._state_lock:
+                # Retry logic
+                if job.retry_count < job.max_retries:
+                    job.retry_count += 1
+                    job.status = JobStatus.PENDING
+                    job.started_at = None
+                    job.completed_at = None
+                    job.error = None
+                    
+                    # Re-queue with lower priority
+                    job.priority = JobPriority(min(job.priority.value + 1, JobPriority.LOW.value))
+                    retry = True
+                else:
+                    job.status = JobStatus.FAILED
+                    job.error = str(e)
+                    job.completed_at = datetime.now()
+                    self.stats['total_jobs_failed'] += 1
+                    retry = False
+            
+            if retry:
                 self.job_queue.put(job)
                 logger.info(f"Job {job.id} queued for retry ({job.retry_count}/{job.max_retries})")
             else:
-                self.stats['total_jobs_failed'] += 1
                 logger.error(f"Job {job.id} failed permanently after {job.max_retries} retries")
         
         finally:
-            # Move from active to completed
-            if job.id in self.active_jobs:
-                del self.active_jobs[job.id]
-            self.completed_jobs[job.id] = job
-            
-            # Update batch status
-            self._update_batch_status(job)
-            
-            # Update queue size
-            self.stats['queue_size'] = self.job_queue.qsize()
-            self.stats['active_workers'] = len(self.active_jobs)
+            with self._state_lock:
+                # Move from active to completed
+                self.active_jobs.pop(job.id, None)
+                self.completed_jobs[job.id] = job
+                
+                # Update batch status
+                self._update_batch_status(job)
+                
+                # Update queue size
+                self.stats['queue_size'] = self.job_queue.qsize()
+                self.stats['active_workers'] = len(self.active_jobs)
             
             # Save progress
             self._save_persistent_data()
@@ -478,12 +552,12 @@ class BatchProcessingService:
             input_data = job.input_data
             
             # Extract parameters
-            image_path = input_data.get('image_path')
-            audio_path = input_data.get('audio_path')
-            output_path = input_data.get('output_path')
-            duration = input_data.get('duration', 5.0)
-            quality = input_data.get('quality', 'medium')
-            effects = input_data.get('effects', [])
+            image_path = input_data.image_path
+            audio_path = input_data.audio_path
+            output_path = input_data.output_path
+            duration = input_data.duration
+            quality = input_data.quality
+            effects = input_data.effects
             
             # Generate video
             result = asyncio.run(self.video_service.generate_video(
@@ -511,11 +585,11 @@ class BatchProcessingService:
             input_data = job.input_data
             
             # Extract parameters
-            text = input_data.get('text')
-            output_path = input_data.get('output_path')
-            voice = input_data.get('voice', 'female')
-            quality = input_data.get('quality', 'medium')
-            language = input_data.get('language', 'en')
+            text = input_data.text
+            output_path = input_data.output_path
+            voice = input_data.voice
+            quality = input_data.quality
+            language = input_data.language
             
             # Generate audio
             result = asyncio.run(self.audio_service.generate_audio(
@@ -543,10 +617,10 @@ class BatchProcessingService:
             input_data = job.input_data
             
             # Extract parameters
-            text = input_data.get('text')
-            source_lang = input_data.get('source_lang')
-            target_lang = input_data.get('target_lang')
-            quality = input_data.get('quality', 'medium')
+            text = input_data.text
+            source_lang = input_data.source_lang
+            target_lang = input_data.target_lang
+            quality = input_data.quality
             
             # Perform translation
             result = asyncio.run(self.translation_service.translate_text(
@@ -561,8 +635,15 @@ class BatchProcessingService:
         except Exception as e:
             raise Exception(f"Translation processing failed: {str(e)}")
     
+    def _touch_batch(self, batch_id: str):
+        """Mark a batch as changed so its cached status is rebuilt"""
+        with self._state_lock:
+            batch_request = self.batch_requests.get(batch_id)
+            if batch_request:
+                batch_request.version += 1
+    
     def _update_batch_status(self, job: BatchJob):
-        """Update the status of the batch containing this job"""
+        """Update the status of the batch containing this job (caller holds _state_lock)"""
         try:
             # Find the batch containing this job
             batch_id = job.id.split('_')[0]
@@ -570,6 +651,7 @@ class BatchProcessingService:
                 return
             
             batch_request = self.batch_requests[batch_id]
+            batch_request.version += 1
             
             # Count completed and failed jobs
             completed_jobs = sum(1 for j in batch_request.jobs if j.status == JobStatus.COMPLETED)
@@ -578,14 +660,16 @@ class BatchProcessingService:
             batch_request.completed_jobs = completed_jobs
             batch_request.failed_jobs = failed_jobs
             
-            # Update batch status
-            if completed_jobs + failed_jobs == batch_request.total_jobs:
+            # Update batch status; only the first worker to see the last job
+            # finish moves the batch to its final status
+            if (completed_jobs + failed_jobs == batch_request.total_jobs
+                    and batch_request.status not in _FINAL_STATUSES):
                 if failed_jobs == 0:
-                    batch_request.status = JobStatus.COMPLETED
+                    self._set_batch_status(batch_request, JobStatus.COMPLETED)
                 elif completed_jobs == 0:
-                    batch_request.status = JobStatus.FAILED
+                    self._set_batch_status(batch_request, JobStatus.FAILED)
                 else:
-                    batch_request.status = JobStatus.COMPLETED  # Partial success
+                    self._set_batch_status(batch_request, JobStatus.COMPLETED)  # Partial success
                 
                 # Calculate actual duration
                 if batch_request.jobs:
@@ -640,7 +724,7 @@ class BatchProcessingService:
                 'failed_jobs': batch_request.failed_jobs,
                 'overall_progress': overall_progress,
                 'job_statuses': job_statuses,
-                'created_at': batch_request.created_at.isoformat(),
+                'created_at': batch_request.created_at_iso,
                 'estimated_duration': batch_request.estimated_duration,
                 'actual_duration': batch_request.actual_duration,
                 'jobs': [
@@ -649,7 +733,7 @@ class BatchProcessingService:
                         'type': job.job_type,
                         'status': job.status.value,
                         'progress': job.progress,
-                        'created_at': job.created_at.isoformat(),
+                        'created_at': job.created_at_iso,
                         'started_at': job.started_at.isoformat() if job.started_at else None,
                         'completed_at': job.completed_at.isoformat() if job.completed_at else None,
                         'error': job.error,
@@ -663,6 +747,25 @@ class BatchProcessingService:
             logger.error(f"Failed to get batch status: {e}")
             return None
     
+    async def get_batch_status_json(self, batch_id: str) -> Optional[bytes]:
+        """Get the status of a batch as JSON bytes, cached until the batch changes"""
+        batch_request = self.batch_requests.get(batch_id)
+        if batch_request is None:
+            return None
+        
+        version = batch_request.version
+        cached = self._status_cache.get(batch_id)
+        if cached and cached[0] == version:
+            return cached[1]
+        
+        batch_status = await self.get_batch_status(batch_id)
+        if batch_status is None:
+            return None
+        
+        status_json = orjson.dumps(batch_status)
+        self._status_cache[batch_id] = (version, status_json)
+        return status_json
+    
     async def cancel_batch(self, batch_id: str) -> bool:
         """Cancel a batch and all its jobs"""
         try:
@@ -672,11 +775,13 @@ class BatchProcessingService:
             batch_request = self.batch_requests[batch_id]
             
             # Cancel all pending jobs
-            for job in batch_request.jobs:
-                if job.status == JobStatus.PENDING:
-                    job.status = JobStatus.CANCELLED
-            
-            batch_request.status = JobStatus.CANCELLED
+            with self._state_lock:
+                for job in batch_request.jobs:
+                    if job.status == JobStatus.PENDING:
+                        job.status = JobStatus.CANCELLED
+                
+                self._set_batch_status(batch_request, JobStatus.CANCELLED)
+                batch_request.version += 1
             
             logger.info(f"Batch {batch_id} cancelled")
             self._save_persistent_data()
@@ -689,49 +794,90 @@ class BatchProcessingService:
     async def get_service_stats(self) -> Dict[str, Any]:
         """Get batch processing service statistics"""
         try:
+            with self._state_lock:
+                stats = dict(self.stats)
+            
             return {
-                'queue_size': self.stats['queue_size'],
-                'active_workers': self.stats['active_workers'],
-                'total_jobs_processed': self.stats['total_jobs_processed'],
-                'total_jobs_failed': self.stats['total_jobs_failed'],
-                'average_processing_time': self.stats['average_processing_time'],
+                'queue_size': stats['queue_size'],
+                'active_workers': stats['active_workers'],
+                'total_jobs_processed': stats['total_jobs_processed'],
+                'total_jobs_failed': stats['total_jobs_failed'],
+                'average_processing_time': stats['average_processing_time'],
                 'success_rate': (
-                    self.stats['total_jobs_processed'] / 
-                    (self.stats['total_jobs_processed'] + self.stats['total_jobs_failed'])
-                    if (self.stats['total_jobs_processed'] + self.stats['total_jobs_failed']) > 0 else 0
+                    stats['total_jobs_processed'] / 
+                    (stats['total_jobs_processed'] + stats['total_jobs_failed'])
+                    if (stats['total_jobs_processed'] + stats['total_jobs_failed']) > 0 else 0
                 ),
                 'max_workers': self.max_workers,
                 'is_running': self.is_running,
                 'total_batches': len(self.batch_requests),
-                'active_batches': sum(1 for b in self.batch_requests.values() 
-                                    if b.status == JobStatus.PROCESSING)
+                'active_batches': len(self._batches_by_status[JobStatus.PROCESSING]),
+                'worker_queue_depths': self.job_queue.queue_depths(),
+                **self.job_queue.steal_stats()
             }
             
         except Exception as e:
             logger.error(f"Failed to get service stats: {e}")
             return {}
     
+    async def get_service_stats_snapshot(self, max_age: float = 0.2) -> Dict[str, Any]:
+        """Get service statistics, recomputed at most every max_age seconds (returns a copy)"""
+        taken_at, stats = self._stats_snapshot
+        now = time.monotonic()
+        if not stats or now - taken_at > max_age:
+            stats = await self.get_service_stats()
+            # Single attribute assignment, so readers always see a consistent pair
+            self._stats_snapshot = (now, stats)
+        return dict(stats)
+    
+    def request_cleanup(self, days_old: int = 7):
+        """Ask the cleanup thread to run now (the smallest pending age wins)"""
+        pending = self._cleanup_requested_days
+        self._cleanup_requested_days = days_old if pending is None else min(pending, days_old)
+        self._cleanup_event.set()
+    
+    def _cleanup_loop(self):
+        """Cleanup thread function"""
+        while self.is_running:
+            self._cleanup_event.wait(timeout=self.cleanup_interval)
+            self._cleanup_event.clear()
+            if not self.is_running:
+                break
+            
+            days_old = self._cleanup_requested_days or self.cleanup_days
+            self._cleanup_requested_days = None
+            self._cleanup_batches(days_old)
+    
     async def cleanup_old_batches(self, days_old: int = 7):
         """Clean up old completed batches"""
+        self._cleanup_batches(days_old)
+    
+    def _cleanup_batches(self, days_old: int):
+        """Remove finished batches and jobs older than days_old"""
         try:
             cutoff_date = datetime.now() - timedelta(days=days_old)
-            to_remove = []
-            
-            for batch_id, batch_request in self.batch_requests.items():
-                if (batch_request.status in [JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED] and
-                    batch_request.created_at < cutoff_date):
-                    to_remove.append(batch_id)
+            cutoff_key = (-cutoff_date.timestamp(), "")
+            
+            # Keys are (-created_at, id), so expired batches sort after the cutoff key
+            with self._index_lock:
+                to_remove = [
+                    batch_request.id
+                    for status in _FINAL_STATUSES
+                    for batch_request in self._batches_by_status[status].irange_key(min_key=cutoff_key)
+                ]
             
-            for batch_id in to_remove:
-                del self.batch_requests[batch_id]
+            with self._save_lock:
+                for batch_id in to_remove:
+                    self._unindex_batch(self.batch_requests.pop(batch_id))
+                    self._status_cache.pop(batch_id, None)
             
             # Clean up completed jobs
-            cutoff_time = datetime.now() - timedelta(days=days_old)
-            old_jobs = [job_id for job_id, job in self.completed_jobs.items() 
-                       if job.completed_at and job.completed_at < cutoff_time]
-            
-            for job_id in old_jobs:
-                del self.completed_jobs[job_id]
+            with self._state_lock:
+                old_jobs = [job_id for job_id, job in self.completed_jobs.items() 
+                           if job.completed_at and job.completed_at < cutoff_date]
+                
+                for job_id in old_jobs:
+                    self.completed_jobs.pop(job_id, None)
             
             self._save_persistent_data()
             logger.info(f"Cleaned up {len(to_remove)} old batches and {len(old_jobs)} old jobs")
@@ -9,7 +9,7 @@ import time
 import json
 import os
 import threading
-from typing import Dict, List, Optional, Any, Callable
+from typing import Dict, List, Optional, Any, Callable, Iterator
 from datetime import datetime, timedelta
 from dataclasses import dataclass, asdict
 from collections import deque
@@ -23,7 +23,7 @@ import gc
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-@dataclass
+@dataclass(slots=True)
 class SystemMetrics:
     """System performance metrics"""
     timestamp: datetime
@@ -43,7 +43,7 @@ class SystemMetrics:
     active_processes: int = 0
     load_average: Optional[float] = None
 
-@dataclass
+@dataclass(slots=True)
 class ProcessMetrics:
     """Process-specific metrics"""
     timestamp: datetime
@@ -55,7 +55,7 @@ class ProcessMetrics:
     status: str
     duration: float
 
-@dataclass
+@dataclass(slots=True)
 class PerformanceAlert:
     """Performance alert"""
     timestamp: datetime
@@ -66,6 +66,17 @@ class PerformanceAlert:
     threshold: float
     recommendation: str
 
+def _record_to_dict(record) -> Dict[str, Any]:
+    """
+    Convert a metrics/alert record to a JSON-ready dict
+    
+    The records only hold scalars, so a shallow read of the slots is
+    enough; asdict() would deep-copy every field.
+    """
+    data = {name: getattr(record, name) for name in record.__slots__}
+    data['timestamp'] = record.timestamp.isoformat()
+    return data
+
 class PerformanceMonitor:
     def __init__(self, cache_dir: str = "cache/performance", 
                  monitoring_interval: float = 5.0,
@@ -536,27 +547,55 @@ class PerformanceMonitor:
     async def get_current_metrics(self) -> Dict[str, Any]:
         """Get current system metrics"""
         try:
-            system_metrics = self._collect_system_metrics()
-            process_metrics = self._collect_process_metrics()
+            # Collection blocks (cpu_percent samples for a full second), so
+            # keep it off the event loop
+            system_metrics = await asyncio.to_thread(self._collect_system_metrics)
+            process_metrics = await asyncio.to_thread(self._collect_process_metrics)
             
-            result = {
+            return {
                 'timestamp': datetime.now().isoformat(),
-                'system': asdict(system_metrics) if system_metrics else None,
-                'process': asdict(process_metrics) if process_metrics else None
+                'system': _record_to_dict(system_metrics) if system_metrics else None,
+                'process': _record_to_dict(process_metrics) if process_metrics else None
             }
             
-            # Convert datetime objects to strings
-            if result['system']:
-                result['system']['timestamp'] = system_metrics.timestamp.isoformat()
-            if result['process']:
-                result['process']['timestamp'] = process_metrics.timestamp.isoformat()
-            
-            return result
-            
         except Exception as e:
             logger.error(f"Failed to get current metrics: {e}")
             return {}
     
+    async def get_current_thresholds_only(self) -> Dict[str, float]:
+        """
+        Get only the usage percentages checked against critical thresholds
+        
+        Cheaper than get_current_metrics: no GPU, network, process or load
+        sampling, and CPU usage comes from the monitoring loop's latest
+        sample while it is fresh. psutil.cpu_percent(interval=None) is not
+        used, since it reports 0.0 on its first call and otherwise measures
+        since whichever caller in the process read it last.
+        """
+        try:
+            return await asyncio.to_thread(self._collect_threshold_usage)
+            
+        except Exception as e:
+            logger.error(f"Failed to get current thresholds: {e}")
+            return {}
+    
+    def _collect_threshold_usage(self) -> Dict[str, float]:
+        """Collect the threshold usage percentages (blocking)"""
+        latest = self.system_metrics_history[-1] if self.system_metrics_history else None
+        max_age = timedelta(seconds=self.monitoring_interval * 2 + 1)
+        if latest is not None and datetime.now() - latest.timestamp <= max_age:
+            cpu_percent = latest.cpu_percent
+        else:
+            # No recent sample yet: measure over an interval, as the loop does
+            cpu_percent = psutil.cpu_percent(interval=1)
+        
+        disk = psutil.disk_usage('/')
+        return {
+            'cpu_percent': cpu_percent,
+            'memory_percent': psutil.virtual_memory().percent,
+            'disk_usage_percent': (disk.used / disk.total) * 100
+        }
+    
     async def get_metrics_history(self, hours: int = 24) -> Dict[str, Any]:
         """Get metrics history for specified hours"""
         try:
@@ -564,14 +603,14 @@ class PerformanceMonitor:
             
             # Filter system metrics
             system_metrics = [
-                {**asdict(m), 'timestamp': m.timestamp.isoformat()}
+                _record_to_dict(m)
                 for m in self.system_metrics_history
                 if m.timestamp >= cutoff_time
             ]
             
             # Filter process metrics
             process_metrics = [
-                {**asdict(m), 'timestamp': m.timestamp.isoformat()}
+                _record_to_dict(m)
                 for m in self.process_metrics_history
                 if m.timestamp >= cutoff_time
             ]
@@ -587,15 +626,43 @@ class PerformanceMonitor:
             logger.error(f"Failed to get metrics history: {e}")
             return {}
     
-    async def get_alerts(self, hours: int = 24) -> List[Dict[str, Any]]:
-        """Get alerts for specified hours"""
+    def iter_history(self, hours: int = 24, kind: str = 'system') -> Iterator[Dict[str, Any]]:
+        """
+        Iterate metrics history for specified hours one sample at a time
+        
+        kind selects the 'system' or 'process' history. The matching records
+        are snapshotted when this is called (references only), so samples
+        recorded while the caller is consuming the iterator are not included
+        and the caller can stream the samples after returning.
+        """
+        history = self.system_metrics_history if kind == 'system' else self.process_metrics_history
+        cutoff_time = datetime.now() - timedelta(hours=hours)
+        
+        return map(_record_to_dict, [m for m in list(history) if m.timestamp >= cutoff_time])
+    
+    async def get_alerts(self, hours: int = 24, level: Optional[str] = None,
+                         category: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get alerts for specified hours, optionally filtered by level and category"""
         try:
             cutoff_time = datetime.now() - timedelta(hours=hours)
-            
+            level = level.lower() if level else None
+            category = category.lower() if category else None
+            
+            if level is None and category is None:
+                return [
+                    _record_to_dict(alert)
+                    for alert in self.alerts_history
+                    if alert.timestamp >= cutoff_time
+                ]
+            
+            # Filter while walking the history so only matching alerts are
+            # converted to dicts
             alerts = [
-                {**asdict(alert), 'timestamp': alert.timestamp.isoformat()}
+                _record_to_dict(alert)
                 for alert in self.alerts_history
                 if alert.timestamp >= cutoff_time
+                and (level is None or alert.level == level)
+                and (category is None or alert.category == category)
             ]
             
             return alerts
@@ -104,6 +104,8 @@ class QualityPresetsService:
         """Initialize quality presets service"""
         self.presets_file = presets_file or "data/quality_presets.json"
         self.presets: Dict[str, QualityPreset] = {}
+        # Bumped whenever the preset set changes so callers can cache views
+        self.version = 0
         self._load_default_presets()
         self._load_custom_presets()
     
@@ -381,6 +383,7 @@ class QualityPresetsService:
         """Add a custom quality preset"""
         try:
             self.presets[preset_id] = preset
+            self.version += 1
             self.save_custom_presets()
             return True
         except Exception as e:
@@ -399,6 +402,7 @@ class QualityPresetsService:
         
         if preset_id in self.presets:
             del self.presets[preset_id]
+            self.version += 1
             self.save_custom_presets()
             return True
         
@@ -410,6 +414,10 @@ class QualityPresetsService:
         if not preset:
             return 0.0
         
+        return self.estimate_file_size_for_preset(preset, duration_seconds, input_file_size_mb)
+    
+    def estimate_file_size_for_preset(self, preset: QualityPreset, duration_seconds: float, input_file_size_mb: Optional[float] = None) -> float:
+        """Estimate output file size in MB for an already fetched preset"""
         # Base estimation using bitrate
         video_bitrate_kbps = int(preset.video.bitrate.replace('k', ''))
         audio_bitrate_kbps = int(preset.audio.bitrate.replace('k', ''))
@@ -436,6 +444,10 @@ class QualityPresetsService:
         if not preset:
             return 0.0
         
+        return self.estimate_processing_time_for_preset(preset, duration_seconds, input_resolution)
+    
+    def estimate_processing_time_for_preset(self, preset: QualityPreset, duration_seconds: float, input_resolution: Optional[str] = None) -> float:
+        """Estimate processing time in seconds for an already fetched preset"""
         # Base processing time (rough estimate: 1x duration for medium quality)
         base_time = duration_seconds
         
@@ -466,6 +478,10 @@ class QualityPresetsService:
         if not preset:
             return []
         
+        return self.get_ffmpeg_video_args_for_preset(preset)
+    
+    def get_ffmpeg_video_args_for_preset(self, preset: QualityPreset) -> List[str]:
+        """Get FFmpeg arguments for video encoding for an already fetched preset"""
         args = []
         video = preset.video
         
@@ -532,6 +548,10 @@ class QualityPresetsService:
         if not preset:
             return []
         
+        return self.get_ffmpeg_audio_args_for_preset(preset)
+    
+    def get_ffmpeg_audio_args_for_preset(self, preset: QualityPreset) -> List[str]:
+        """Get FFmpeg arguments for audio encoding for an already fetched preset"""
         args = []
         audio = preset.audio
         
@@ -0,0 +1,192 @@
+"""
+Job Scheduling
+Job types and the work-stealing scheduler used by the batch processing service
+"""
+
+import itertools
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, List, Optional, Union
+
+class JobStatus(Enum):
+    PENDING = "pending"
+    PROCESSING = "processing"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+class JobPriority(Enum):
+    LOW = 3
+    MEDIUM = 2
+    HIGH = 1
+    URGENT = 0
+
+@dataclass(slots=True, frozen=True)
+class VideoJobInput:
+    """Validated input for a video generation job"""
+    image_path: str
+    output_path: str
+    audio_path: Optional[str] = None
+    duration: float = 5.0
+    quality: str = 'medium'
+    effects: List[str] = field(default_factory=list)
+
+@dataclass(slots=True, frozen=True)
+class AudioJobInput:
+    """Validated input for an audio generation job"""
+    text: str
+    output_path: str
+    voice: str = 'female'
+    quality: str = 'medium'
+    language: str = 'en'
+
+@dataclass(slots=True, frozen=True)
+class TranslationJobInput:
+    """Validated input for a translation job"""
+    text: str
+    target_lang: str
+    source_lang: Optional[str] = None
+    quality: str = 'medium'
+
+JobInput = Union[VideoJobInput, AudioJobInput, TranslationJobInput]
+
+# Input type for each job type, used when restoring jobs from disk
+JOB_INPUT_TYPES = {
+    'video': VideoJobInput,
+    'audio': AudioJobInput,
+    'translation': TranslationJobInput
+}
+
+@dataclass
+class BatchJob:
+    """Represents a single job in the batch processing queue"""
+    id: str
+    job_type: str  # 'video', 'audio', 'translation'
+    input_data: JobInput
+    priority: JobPriority
+    status: JobStatus
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    progress: float = 0.0
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    retry_count: int = 0
+    max_retries: int = 3
+    created_at_iso: str = field(default="", repr=False)
+
+    def __post_init__(self):
+        """Normalize created_at and cache its ISO form for status responses"""
+        if isinstance(self.created_at, str):
+            self.created_at = datetime.fromisoformat(self.created_at)
+        self.created_at_iso = self.created_at.isoformat()
+
+class WorkStealingScheduler:
+    """
+    Job scheduler with one set of priority deques per worker
+    
+    New jobs are spread round-robin across workers. A worker always takes a
+    job of the most urgent priority queued anywhere: from the head of its own
+    deque at that level if it has one, otherwise by stealing half of a random
+    victim's deque at that level from the tail. Each steal probes one random
+    victim first and only falls back to a victim known to hold jobs when the
+    probe misses, so the steal success rate shows how evenly work is spread.
+    All deques share one condition variable, so idle workers block instead
+    of polling.
+    """
+    
+    # Window for steals_per_second
+    STEAL_RATE_WINDOW = 60.0
+    
+    def __init__(self, num_workers: int):
+        self.num_workers = num_workers
+        # One deque per priority level (index = JobPriority value, 0 is most urgent)
+        self._queues = [
+            [deque() for _ in range(len(JobPriority))] for _ in range(num_workers)
+        ]
+        self._cond = threading.Condition()
+        self._size = 0
+        # Jobs queued at each priority level across all workers
+        self._level_sizes = [0] * len(JobPriority)
+        self._next_worker = itertools.count()
+        self.steals_attempted = 0
+        self.steals_succeeded = 0
+        self._steal_times: deque = deque()
+    
+    def put(self, job: BatchJob):
+        """Queue a job on the next worker in round-robin order"""
+        with self._cond:
+            worker_id = next(self._next_worker) % self.num_workers
+            self._queues[worker_id][job.priority.value].append(job)
+            self._size += 1
+            self._level_sizes[job.priority.value] += 1
+            self._cond.notify()
+    
+    def get(self, worker_id: int, timeout: float = 1.0) -> Optional[BatchJob]:
+        """Get the most urgent queued job for a worker, or None on timeout"""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._size > 0, timeout=timeout):
+                return None
+            
+            own = self._queues[worker_id]
+            for level in range(len(JobPriority)):
+                if not own[level] and self._level_sizes[level]:
+                    self._steal(worker_id, level)
+                if own[level]:
+                    self._size -= 1
+                    self._level_sizes[level] -= 1
+                    return own[level].popleft()
+        return None
+    
+    def _steal(self, worker_id: int, level: int):
+        """Move half of a victim's deque at one priority level to this worker"""
+        others = [w for w in range(self.num_workers) if w != worker_id]
+        if not others:
+            return
+        
+        self.steals_attempted += 1
+        victim = random.choice(others)
+        if not self._queues[victim][level]:
+            # Missed: retry on a victim holding jobs at this level so the
+            # most urgent job is still taken first
+            victims = [w for w in others if self._queues[w][level]]
+            if not victims:
+                return
+            self.steals_attempted += 1
+            victim = random.choice(victims)
+        
+        queue = self._queues[victim][level]
+        count = (len(queue) + 1) // 2
+        stolen = [queue.pop() for _ in range(count)]
+        self._queues[worker_id][level].extend(reversed(stolen))
+        self.steals_succeeded += 1
+        self._steal_times.append(time.monotonic())
+    
+    def steal_stats(self) -> Dict[str, float]:
+        """Steal success rate and successful steals per second over the last STEAL_RATE_WINDOW seconds"""
+        with self._cond:
+            cutoff = time.monotonic() - self.STEAL_RATE_WINDOW
+            while self._steal_times and self._steal_times[0] < cutoff:
+                self._steal_times.popleft()
+            return {
+                'steal_success_rate': (
+                    self.steals_succeeded / self.steals_attempted
+                    if self.steals_attempted > 0 else 0
+                ),
+                'steals_per_second': len(self._steal_times) / self.STEAL_RATE_WINDOW
+            }
+    
+    def queue_depths(self) -> List[int]:
+        """Number of queued jobs held by each worker"""
+        with self._cond:
+            return [sum(len(queue) for queue in queues) for queues in self._queues]
+    
+    def qsize(self) -> int:
+        """Total number of queued jobs"""
+        with self._cond:
+            return self._size
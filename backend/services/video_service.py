@@ -10,7 +10,7 @@ import subprocess
 import tempfile
 import hashlib
 import json
-from typing import Optional, Tuple, Dict, List
+from typing import Optional, Tuple, Dict, List, Any
 from PIL import Image, ImageEnhance, ImageFilter, ImageDraw
 import moviepy.editor as mp
 from functools import lru_cache
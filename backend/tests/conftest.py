@@ -0,0 +1,9 @@
+"""
+Pytest configuration for the backend tests
+"""
+
+import os
+import sys
+
+# Backend modules are imported the way main.py imports them (services.x, database)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
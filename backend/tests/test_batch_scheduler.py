@@ -0,0 +1,131 @@
+"""
+Tests for the work-stealing job scheduler in services.scheduling
+"""
+
+import threading
+import time
+from datetime import datetime
+
+from services import scheduling
+from services.scheduling import (
+    AudioJobInput, BatchJob, JobPriority, JobStatus, WorkStealingScheduler
+)
+
+
+def make_job(job_id: str, priority: JobPriority = JobPriority.MEDIUM) -> BatchJob:
+    return BatchJob(
+        id=job_id,
+        job_type='audio',
+        input_data=AudioJobInput(text=job_id, output_path=f"{job_id}.mp3"),
+        priority=priority,
+        status=JobStatus.PENDING,
+        created_at=datetime.now(),
+    )
+
+
+def test_most_urgent_job_is_taken_first_even_from_another_worker():
+    scheduler = WorkStealingScheduler(2)
+    scheduler.put(make_job("low", JobPriority.LOW))        # worker 0
+    scheduler.put(make_job("urgent", JobPriority.URGENT))  # worker 1
+
+    assert scheduler.get(0, timeout=0).id == "urgent"
+    assert scheduler.steals_succeeded == 1
+    assert scheduler.get(0, timeout=0).id == "low"
+    assert scheduler.qsize() == 0
+
+
+def test_missed_probe_counts_as_a_failed_steal(monkeypatch):
+    scheduler = WorkStealingScheduler(3)
+    for index in range(3):
+        scheduler.put(make_job(f"job-{index}"))  # one job per worker
+    scheduler.get(0, timeout=0)
+    scheduler.get(1, timeout=0)
+
+    # Probe worker 1 (empty) first, then fall back to worker 2
+    monkeypatch.setattr(scheduling.random, "choice", lambda seq: seq[0])
+    assert scheduler.get(0, timeout=0).id == "job-2"
+    assert (scheduler.steals_attempted, scheduler.steals_succeeded) == (2, 1)
+
+    stats = scheduler.steal_stats()
+    assert stats["steal_success_rate"] == 0.5
+    assert stats["steals_per_second"] == 1 / WorkStealingScheduler.STEAL_RATE_WINDOW
+
+
+def test_no_steal_is_attempted_when_nothing_is_queued_at_a_level():
+    scheduler = WorkStealingScheduler(2)
+    scheduler.put(make_job("low", JobPriority.LOW))  # worker 0
+
+    assert scheduler.get(0, timeout=0).id == "low"
+    assert scheduler.steals_attempted == 0
+    assert scheduler.steal_stats() == {"steal_success_rate": 0, "steals_per_second": 0}
+
+
+def test_jobs_of_one_priority_are_taken_in_order():
+    scheduler = WorkStealingScheduler(1)
+    for index in range(5):
+        scheduler.put(make_job(f"job-{index}"))
+
+    assert [scheduler.get(0, timeout=0).id for _ in range(5)] == [
+        f"job-{index}" for index in range(5)
+    ]
+
+
+def test_steal_takes_half_from_the_tail():
+    scheduler = WorkStealingScheduler(2)
+    for index in range(8):
+        scheduler.put(make_job(f"job-{index}"))  # even ids on worker 0, odd on worker 1
+
+    # Drain worker 1's own deque, then it steals from worker 0
+    assert [scheduler.get(1, timeout=0).id for _ in range(4)] == [
+        "job-1", "job-3", "job-5", "job-7"
+    ]
+    assert scheduler.get(1, timeout=0).id == "job-4"
+    assert scheduler.queue_depths() == [2, 1]
+
+
+def test_get_returns_none_after_timeout():
+    scheduler = WorkStealingScheduler(2)
+    started = time.monotonic()
+    assert scheduler.get(0, timeout=0.05) is None
+    assert time.monotonic() - started >= 0.05
+
+
+def test_blocked_get_wakes_on_put():
+    scheduler = WorkStealingScheduler(2)
+    result = []
+    consumer = threading.Thread(target=lambda: result.append(scheduler.get(1, timeout=5)))
+    consumer.start()
+    time.sleep(0.05)
+    scheduler.put(make_job("late"))
+    consumer.join(timeout=1)
+
+    assert not consumer.is_alive()
+    assert result[0].id == "late"
+
+
+def test_each_job_is_taken_exactly_once_across_threads():
+    num_workers, num_jobs = 4, 400
+    scheduler = WorkStealingScheduler(num_workers)
+    priorities = list(JobPriority)
+    for index in range(num_jobs):
+        scheduler.put(make_job(f"job-{index}", priorities[index % len(priorities)]))
+
+    taken = [[] for _ in range(num_workers)]
+
+    def work(worker_id):
+        while True:
+            job = scheduler.get(worker_id, timeout=0.05)
+            if job is None:
+                return
+            taken[worker_id].append(job.id)
+
+    threads = [threading.Thread(target=work, args=(w,)) for w in range(num_workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    ids = [job_id for ids in taken for job_id in ids]
+    assert len(ids) == num_jobs
+    assert set(ids) == {f"job-{index}" for index in range(num_jobs)}
+    assert scheduler.qsize() == 0
@@ -0,0 +1,245 @@
+"""
+Tests for the batched profile loader and error handling in database.py
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import database
+from database import BatchLoader, SupabaseClient, supa_handler
+
+
+class RecordingLoader:
+    """batch_load_fn that records every batch it is called with"""
+
+    def __init__(self, results=None, error=None):
+        self.calls = []
+        self.results = results
+        self.error = error
+
+    async def __call__(self, keys):
+        self.calls.append(list(keys))
+        await asyncio.sleep(0)
+        if self.error is not None:
+            raise self.error
+        if self.results is not None:
+            return {key: self.results[key] for key in keys if key in self.results}
+        return {key: f"value-{key}" for key in keys}
+
+
+def test_loads_from_the_same_tick_share_one_batch():
+    async def main():
+        fn = RecordingLoader()
+        loader = BatchLoader(fn)
+        values = await asyncio.gather(loader.load("a"), loader.load("b"), loader.load("c"))
+        return fn.calls, values
+
+    calls, values = asyncio.run(main())
+    assert calls == [["a", "b", "c"]]
+    assert values == ["value-a", "value-b", "value-c"]
+
+
+def test_duplicate_keys_share_a_future():
+    async def main():
+        fn = RecordingLoader()
+        loader = BatchLoader(fn)
+        first, second = loader.load("a"), loader.load("a")
+        assert first is second
+        await first
+        return fn.calls
+
+    assert asyncio.run(main()) == [["a"]]
+
+
+def test_batches_are_split_at_max_batch_size():
+    async def main():
+        fn = RecordingLoader()
+        loader = BatchLoader(fn, max_batch_size=2)
+        await asyncio.gather(*(loader.load(key) for key in "abcde"))
+        return fn.calls
+
+    assert asyncio.run(main()) == [["a", "b"], ["c", "d"], ["e"]]
+
+
+def test_loads_in_later_ticks_get_new_batches():
+    async def main():
+        fn = RecordingLoader()
+        loader = BatchLoader(fn)
+        await loader.load("a")
+        await loader.load("b")
+        return fn.calls
+
+    assert asyncio.run(main()) == [["a"], ["b"]]
+
+
+def test_missing_keys_resolve_to_none():
+    async def main():
+        loader = BatchLoader(RecordingLoader(results={"a": 1}))
+        return await asyncio.gather(loader.load("a"), loader.load("missing"))
+
+    assert asyncio.run(main()) == [1, None]
+
+
+def test_errors_reach_every_waiter():
+    async def main():
+        loader = BatchLoader(RecordingLoader(error=RuntimeError("boom")))
+        return await asyncio.gather(loader.load("a"), loader.load("b"), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert [str(result) for result in results] == ["boom", "boom"]
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_dispatched_tasks_are_held_until_done():
+    async def main():
+        loader = BatchLoader(RecordingLoader())
+        future = loader.load("a")
+        await asyncio.sleep(0)
+        held = len(loader._tasks)
+        await future
+        await asyncio.sleep(0)
+        return held, len(loader._tasks)
+
+    assert asyncio.run(main()) == (1, 0)
+
+
+class FakeQuery:
+    """Records one table query and returns rows whose id is in the .in_() filter"""
+
+    def __init__(self, table, rows, log):
+        self.table, self.rows, self.log = table, rows, log
+        self.columns = None
+        self.ids = None
+
+    def select(self, columns):
+        self.columns = columns
+        return self
+
+    def in_(self, column, ids):
+        self.ids = list(ids)
+        return self
+
+    async def execute(self):
+        self.log.append((self.table, self.columns, self.ids))
+        return SimpleNamespace(data=[row for row in self.rows if row["id"] in self.ids])
+
+
+class FakeClient:
+    def __init__(self, tables):
+        self.tables = tables
+        self.log = []
+
+    def table(self, name):
+        return FakeQuery(name, self.tables[name], self.log)
+
+    def rpc(self, *args, **kwargs):
+        raise AssertionError("profiles must not be loaded through an RPC")
+
+
+def make_client(tables):
+    client = SupabaseClient(database._CREATE_TOKEN)
+    client.client = FakeClient(tables)
+    return client
+
+
+TABLES = {
+    "users": [{"id": "u1", "email": "one@example.org"}],
+    "profiles": [{"id": "u1", "full_name": "shadowed"}, {"id": "p2", "full_name": "Two"}],
+}
+
+
+@pytest.mark.parametrize("user_ids", [["u1"], ["u1", "p2", "nobody"]])
+def test_profiles_use_the_same_queries_for_any_batch_size(user_ids):
+    client = make_client(TABLES)
+    profiles = asyncio.run(client._batch_load_profiles(user_ids))
+
+    assert profiles["u1"] == {"id": "u1", "email": "one@example.org"}
+    assert client.client.log[0] == ("users", database._USER_COLUMNS, user_ids)
+    if len(user_ids) > 1:
+        assert profiles["p2"] == {"id": "p2", "full_name": "Two"}
+        assert "nobody" not in profiles
+        assert client.client.log[1] == ("profiles", "*", ["p2", "nobody"])
+    else:
+        assert len(client.client.log) == 1
+
+
+def test_user_columns_exclude_credentials():
+    columns = database._USER_COLUMNS.split(",")
+    for secret in ("password_hash", "verification_token", "reset_token", "reset_token_expires"):
+        assert secret not in columns
+
+
+def test_get_user_profile_batches_concurrent_lookups():
+    client = make_client(TABLES)
+
+    async def main():
+        return await asyncio.gather(client.get_user_profile("u1"), client.get_user_profile("p2"))
+
+    first, second = asyncio.run(main())
+    assert first["success"] and second["success"]
+    assert [entry[0] for entry in client.client.log] == ["users", "profiles"]
+
+
+def test_supabase_client_requires_create():
+    with pytest.raises(TypeError):
+        SupabaseClient()
+
+
+def test_supa_handler_turns_exceptions_into_failure_responses():
+    @supa_handler("tag")
+    async def fails():
+        raise ValueError("bad input")
+
+    @supa_handler("tag")
+    async def succeeds():
+        return {"success": True}
+
+    assert asyncio.run(fails()) == {"success": False, "message": "tag: bad input"}
+    assert asyncio.run(succeeds()) == {"success": True}
+    assert fails.__name__ == "fails"
+
+
+def classify(error_msg):
+    for pattern, message in database._RESEND_ERRORS:
+        if pattern.search(error_msg):
+            return message
+    return database._INVALID_EMAIL_MSG
+
+
+@pytest.mark.parametrize("error_msg, expected_index", [
+    ("email rate limit exceeded", 0),
+    ("429: too many requests", 0),
+    ("invalid email", 1),
+    ("user not found", 1),
+    ("email already confirmed", 2),
+    ("you must provide either an email or phone number", 3),
+])
+def test_resend_errors_are_classified_in_order(error_msg, expected_index):
+    assert classify(error_msg) == database._RESEND_ERRORS[expected_index][1]
+
+
+def test_unknown_resend_errors_fall_back_to_invalid_email():
+    assert classify("something unexpected") == database._INVALID_EMAIL_MSG
+
+
+class RpcClient:
+    """Fake client whose RPCs all succeed"""
+
+    def rpc(self, name, params):
+        return SimpleNamespace(execute=lambda: asyncio.sleep(0, SimpleNamespace(data=True)))
+
+
+def test_video_activity_keeps_other_users_stats_cached():
+    client = SupabaseClient(database._CREATE_TOKEN)
+    client.client = RpcClient()
+    for user_id in ("owner", "viewer"):
+        client._cache_put(client._stats_cache, ("stats", user_id), {"success": True}, 30.0, 10)
+    client._cache_put(client._trending_cache, ("trending",), {"success": True}, 30.0, 10)
+
+    asyncio.run(client.increment_video_views("video", "viewer"))
+
+    assert client._cache_get(client._stats_cache, ("stats", "owner")) is not None
+    assert client._cache_get(client._stats_cache, ("stats", "viewer")) is None
+    assert not client._trending_cache
@@ -0,0 +1,82 @@
+"""
+Tests for the streaming SQL statement splitter used by apply_database_fix
+"""
+
+from apply_database_fix import iter_sql_statements
+
+
+def split(tmp_path, sql: str):
+    path = tmp_path / "fix.sql"
+    path.write_text(sql, encoding="utf-8")
+    return list(iter_sql_statements(path))
+
+
+def test_splits_on_semicolons(tmp_path):
+    assert split(tmp_path, "SELECT 1;\nSELECT 2;\n") == ["SELECT 1", "SELECT 2"]
+
+
+def test_statement_spanning_lines_and_without_trailing_semicolon(tmp_path):
+    sql = "CREATE TABLE t (\n    id INT\n);\nSELECT 2"
+    assert split(tmp_path, sql) == ["CREATE TABLE t (\n    id INT\n)", "SELECT 2"]
+
+
+def test_empty_and_blank_files(tmp_path):
+    assert split(tmp_path, "") == []
+    assert split(tmp_path, "\n  ;\n;") == []
+
+
+def test_semicolons_inside_dollar_quoted_body(tmp_path):
+    sql = (
+        "CREATE FUNCTION f() RETURNS void AS $$\n"
+        "BEGIN\n"
+        "    PERFORM 1;\n"
+        "    PERFORM 2;\n"
+        "END;\n"
+        "$$ LANGUAGE plpgsql;\n"
+        "SELECT 3;\n"
+    )
+    statements = split(tmp_path, sql)
+    assert len(statements) == 2
+    assert statements[0].startswith("CREATE FUNCTION f()")
+    assert "PERFORM 2;" in statements[0]
+    assert statements[0].endswith("$$ LANGUAGE plpgsql")
+    assert statements[1] == "SELECT 3"
+
+
+def test_semicolons_and_escaped_quotes_inside_strings(tmp_path):
+    sql = "INSERT INTO t VALUES ('it''s; fine');\nSELECT 'a;b';\n"
+    assert split(tmp_path, sql) == [
+        "INSERT INTO t VALUES ('it''s; fine')",
+        "SELECT 'a;b'",
+    ]
+
+
+def test_comments_are_dropped(tmp_path):
+    sql = (
+        "-- header comment; with a semicolon\n"
+        "SELECT 1; -- trailing comment\n"
+        "SELECT 2 -- before the end\n"
+        ";\n"
+    )
+    assert split(tmp_path, sql) == ["SELECT 1", "SELECT 2"]
+
+
+def test_comment_inside_a_statement_keeps_tokens_apart(tmp_path):
+    sql = "SELECT 1--c\nFROM t;\nSELECT a -- c\n  , b\nFROM u;\n"
+    assert split(tmp_path, sql) == ["SELECT 1\nFROM t", "SELECT a \n  , b\nFROM u"]
+
+
+def test_comment_markers_inside_strings_and_bodies_are_kept(tmp_path):
+    sql = (
+        "SELECT '--not a comment';\n"
+        "CREATE FUNCTION g() RETURNS text AS $$ SELECT '-- kept; too' $$ LANGUAGE sql;\n"
+    )
+    assert split(tmp_path, sql) == [
+        "SELECT '--not a comment'",
+        "CREATE FUNCTION g() RETURNS text AS $$ SELECT '-- kept; too' $$ LANGUAGE sql",
+    ]
+
+
+def test_non_ascii_statements(tmp_path):
+    sql = "COMMENT ON TABLE public.users IS 'جدول المستخدمين الرئيسي';\n"
+    assert split(tmp_path, sql) == ["COMMENT ON TABLE public.users IS 'جدول المستخدمين الرئيسي'"]
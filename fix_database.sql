@@ -592,6 +592,52 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql SECURITY DEFINER;
 
+-- إنشاء دالة للحصول على ملف المستخدم من users أو profiles في استعلام واحد
+-- تعمل بصلاحيات المستدعي حتى تطبق سياسات RLS، ولا تعيد من users إلا الأعمدة الآمنة
+-- (بدون password_hash أو رموز التحقق وإعادة التعيين)
+CREATE OR REPLACE FUNCTION get_profile_any(user_uuid UUID)
+RETURNS JSONB AS $$
+BEGIN
+    RETURN (
+        SELECT found.profile
+        FROM (
+            SELECT jsonb_build_object(
+                       'id', u.id,
+                       'email', u.email,
+                       'is_verified', u.is_verified,
+                       'created_at', u.created_at,
+                       'updated_at', u.updated_at
+                   ) AS profile, 1 AS source
+            FROM public.users u WHERE u.id = user_uuid
+            UNION ALL
+            SELECT to_jsonb(p) AS profile, 2 AS source FROM public.profiles p WHERE p.id = user_uuid
+        ) found
+        ORDER BY found.source
+        LIMIT 1
+    );
+END;
+$$ LANGUAGE plpgsql STABLE SECURITY INVOKER;
+
+REVOKE EXECUTE ON FUNCTION get_profile_any(UUID) FROM PUBLIC, anon;
+GRANT EXECUTE ON FUNCTION get_profile_any(UUID) TO authenticated, service_role;
+
+-- إنشاء دالة لتبديل الإعجاب بفيديو في استعلام واحد (ترجع true عند الإعجاب)
+CREATE OR REPLACE FUNCTION toggle_like(user_uuid UUID, video_uuid UUID)
+RETURNS BOOLEAN AS $$
+    WITH del AS (
+        DELETE FROM public.likes
+        WHERE user_id = user_uuid AND video_id = video_uuid
+        RETURNING 1
+    ), ins AS (
+        INSERT INTO public.likes (user_id, video_id)
+        SELECT user_uuid, video_uuid
+        WHERE NOT EXISTS (SELECT 1 FROM del)
+        ON CONFLICT (user_id, video_id) DO NOTHING
+        RETURNING 1
+    )
+    SELECT EXISTS (SELECT 1 FROM ins);
+$$ LANGUAGE sql;
+
 -- إنشاء extension للبحث النصي المتقدم (اختياري)
 -- CREATE EXTENSION IF NOT EXISTS pg_trgm;
 -- CREATE INDEX IF NOT EXISTS idx_videos_title_trgm ON public.videos USING gin (title gin_trgm_ops);